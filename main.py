@@ -3,6 +3,7 @@ Aplicación principal del sistema de gestión de tickets de Mercadona.
 """
 
 import argparse
+import atexit
 import sys
 from typing import Optional
 
@@ -25,6 +26,7 @@ def setup_application() -> tuple[AppConfig, PostgreSQLTicketStorage]:
     
     # Configurar almacenamiento
     storage = PostgreSQLTicketStorage(config.database)
+    atexit.register(storage.close)
     
     try:
         # Crear tablas si no existen
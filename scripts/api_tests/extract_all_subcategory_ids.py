@@ -8,14 +8,15 @@ def extract_all_subcategory_ids():
     """Extrae todos los IDs de subcategorías del JSON."""
     
     # Cargar categorías
-    with open('src/mercagasto/storage/data/categorias.json', 'r') as f:
-        data = json.load(f)
+    with open('src/mercagasto/storage/data/categorias.json', 'rb') as f:
+        data = json.loads(f.read())
     
     # Extraer todos los IDs de subcategorías
-    subcategory_ids = []
-    for main_category in data['results']:
-        for subcategory in main_category['categories']:
-            subcategory_ids.append(subcategory['id'])
+    subcategory_ids = [
+        subcategory['id']
+        for main_category in data['results']
+        for subcategory in main_category['categories']
+    ]
     
     # Convertir a string separado por comas para usar directamente
     ids_string = ','.join(map(str, subcategory_ids))
@@ -6,8 +6,8 @@ async def find_active_subcategories():
     client = MercadonaAPIClient()
     
     # Load categories.json to get subcategory IDs
-    with open('src/mercagasto/storage/data/categorias.json', 'r') as f:
-        data = json.load(f)
+    with open('src/mercagasto/storage/data/categorias.json', 'rb') as f:
+        data = json.loads(f.read())
     
     # Extract subcategory IDs from the JSON structure
     subcategory_ids = []
@@ -22,25 +22,42 @@ from mercagasto.config.settings import get_database_config
 from mercagasto.storage.product_loader import MercadonaProductLoader
 
 
-def extract_products_from_api(category_ids: list, output_file: str = None):
+# Caché en disco de las respuestas de la API por categoría (24 h de vigencia)
+CACHE_DIR = Path.cwd() / ".cache" / "categories"
+
+
+def extract_products_from_api(category_ids: list, output_file: str = None,
+                              use_cache: bool = True, refresh_cache: bool = False,
+                              ndjson: bool = False, resume: bool = False,
+                              top_categories: int = 20):
     """
     Extrae productos de la API de Mercadona por categorías.
     
     Args:
         category_ids: Lista de IDs de categorías
-        output_file: Archivo donde guardar los productos (JSON)
+        output_file: Archivo donde guardar los productos (JSON, o NDJSON si
+            termina en .ndjson)
+        use_cache: Si reutilizar las respuestas cacheadas en disco
+        refresh_cache: Si revalidar con la API aunque la caché siga vigente
+        ndjson: Si el archivo por defecto se genera en NDJSON
+        resume: Si continuar la extracción interrumpida de ``output_file`` (NDJSON)
+        top_categories: Categorías con más productos a mostrar en el resumen
     """
     
     if not output_file:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = f"productos_mercadona_{timestamp}.json"
+        extension = "ndjson" if ndjson else "json"
+        output_file = f"productos_mercadona_{timestamp}.{extension}"
     
     print(f"🌐 Extrayendo productos de {len(category_ids)} categorías desde API...")
     print(f"📂 Archivo de salida: {output_file}")
     
     try:
         # Crear cliente de API
-        api_client = MercadonaAPIClient()
+        api_client = MercadonaAPIClient(
+            cache_dir=str(CACHE_DIR) if use_cache else None,
+            refresh_cache=refresh_cache
+        )
         
         # Probar conexión
         if not api_client.test_connection():
@@ -50,30 +67,40 @@ def extract_products_from_api(category_ids: list, output_file: str = None):
         # Crear extractor
         extractor = MercadonaProductExtractor(api_client)
         
-        # Extraer productos de todas las categorías (tratándolas como subcategorías)
-        all_products = extractor.extract_all_products(category_ids, treat_as_subcategories=True)
-        
-        if not all_products:
+        # Extraer productos de todas las categorías (tratándolas como subcategorías).
+        # En NDJSON cada categoría se vuelca al archivo según termina, sin
+        # acumular todos los productos en memoria
+        ndjson_output = output_file.endswith('.ndjson')
+        all_products = extractor.extract_all_products(
+            category_ids, treat_as_subcategories=True,
+            ndjson_file=output_file if ndjson_output else None,
+            resume=resume, top_categories=top_categories
+        )
+        total_products = extractor.extraction_stats['total_products'] if ndjson_output else len(all_products)
+        
+        if not total_products:
             print("⚠️  No se encontraron productos")
             return False
         
-        # Preparar datos para JSON
-        output_data = {
-            "extraction_info": {
-                "timestamp": datetime.now().isoformat(),
-                "categories_processed": category_ids,
-                "total_products": len(all_products),
-                "extractor_stats": extractor.extraction_stats
-            },
-            "products": all_products
-        }
-        
-        # Guardar en JSON
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        if not ndjson_output:
+            # Preparar datos para JSON
+            output_data = {
+                "extraction_info": {
+                    "timestamp": datetime.now().isoformat(),
+                    "categories_processed": category_ids,
+                    "total_products": len(all_products),
+                    "extractor_stats": extractor.extraction_stats
+                },
+                "products": all_products
+            }
+            
+            # Guardar en JSON (serializado en memoria y escrito de una vez)
+            contenido = json.dumps(output_data, indent=2, ensure_ascii=False)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(contenido)
         
         print(f"✅ Extracción completada:")
-        print(f"   📦 Total productos: {len(all_products)}")
+        print(f"   📦 Total productos: {total_products}")
         print(f"   📄 Archivo generado: {output_file}")
         
         # Cerrar conexión
@@ -110,6 +137,7 @@ def load_products_to_database(json_file: str):
         print(f"   📦 Total productos: {stats['total_products']}")
         print(f"   ✅ Insertados: {stats['inserted']}")
         print(f"   🔄 Actualizados: {stats['updated']}")
+        print(f"   💤 Sin cambios: {stats['unchanged']}")
         print(f"   ⚠️  Omitidos: {stats['skipped']}")
         print(f"   ❌ Errores: {stats['errors']}")
         
@@ -135,19 +163,37 @@ def main():
                        help="Archivo de salida para la extracción")
     parser.add_argument('--no-load', action='store_true',
                        help="No cargar a BD después de extraer")
+    parser.add_argument('--no-cache', action='store_true',
+                       help=f"No usar la caché de categorías en {CACHE_DIR}")
+    parser.add_argument('--refresh', action='store_true',
+                       help="Revalidar con la API las categorías cacheadas aunque sigan vigentes")
+    parser.add_argument('--ndjson', action='store_true',
+                       help="Guardar la extracción en NDJSON (un producto por línea)")
+    parser.add_argument('--resume', action='store_true',
+                       help="Continuar una extracción interrumpida en el NDJSON de --output")
+    parser.add_argument('--top', type=int, default=20, metavar='N',
+                       help="Categorías con más productos a mostrar en el resumen (por defecto 20)")
     
     args = parser.parse_args()
     
+    if args.resume and not (args.output and args.output.endswith('.ndjson')):
+        print("❌ Error: --resume requiere --output con un archivo .ndjson")
+        sys.exit(1)
+    
     if args.categories:
         # Flujo completo: extraer y cargar
         try:
-            category_ids = [int(x.strip()) for x in args.categories.split(',')]
+            category_ids = list(map(int, args.categories.split(',')))  # int() ya ignora los espacios
         except ValueError:
             print("❌ Error: Las categorías deben ser números separados por comas")
             sys.exit(1)
         
         # Extraer de API
-        json_file = extract_products_from_api(category_ids, args.output)
+        json_file = extract_products_from_api(
+            category_ids, args.output,
+            use_cache=not args.no_cache, refresh_cache=args.refresh,
+            ndjson=args.ndjson, resume=args.resume, top_categories=args.top
+        )
         
         if json_file and not args.no_load:
             # Cargar a BD
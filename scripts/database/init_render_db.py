@@ -57,8 +57,8 @@ def load_categories_data(storage: PostgreSQLTicketStorage) -> bool:
             logger.warning(f"Archivo de categorías no encontrado: {categories_file}")
             return True  # No es crítico
             
-        with categories_file.open('r', encoding='utf-8') as f:
-            categories_data = json.load(f)
+        # Lectura única en binario: json.loads decodifica el UTF-8 directamente
+        categories_data = json.loads(categories_file.read_bytes())
         
         with storage.get_connection() as conn:
             with conn.cursor() as cursor:
@@ -38,6 +38,7 @@ def load_products(json_file: str, batch_size: int = 100):
         print(f"   📦 Total productos: {stats['total_products']}")
         print(f"   ✅ Insertados: {stats['inserted']}")
         print(f"   🔄 Actualizados: {stats['updated']}")
+        print(f"   💤 Sin cambios: {stats['unchanged']}")
         print(f"   ⚠️  Omitidos: {stats['skipped']}")
         print(f"   ❌ Errores: {stats['errors']}")
         
@@ -69,7 +69,7 @@ def load_products_to_database(json_file: str,
                 logger.warning("⚠️  No se encontraron productos para cargar")
                 return False
             
-            success_rate = ((stats['inserted'] + stats['updated']) / stats['total_products']) * 100
+            success_rate = ((stats['inserted'] + stats['updated'] + stats['unchanged']) / stats['total_products']) * 100
             
             if success_rate >= 90:
                 logger.info(f"✅ Carga exitosa: {success_rate:.1f}% productos procesados correctamente")
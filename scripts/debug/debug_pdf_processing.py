@@ -61,11 +61,12 @@ def debug_pdf(pdf_path: Path):
         print(text)
         print("-" * 40)
         
-        # Mostrar líneas para debug
-        lines = text.split('\n')
+        # Mostrar líneas para debug: se reutilizan las que ya divide el parser
+        parser = MercadonaTicketParser(text)
+        lines = parser.lines
         print(f"\n📝 Estructura del texto ({len(lines)} líneas):")
-        for i, line in enumerate(lines, 1):  # Primeras 20 líneas
-            print(f"{i:2d}: {repr(line)}")
+        # Se vuelca todo el listado con una única escritura en lugar de un print por línea
+        print('\n'.join(f"{i:2d}: {repr(line)}" for i, line in enumerate(lines, 1)))
             
     except Exception as e:
         print(f"❌ Error extrayendo texto: {e}")
@@ -75,7 +76,6 @@ def debug_pdf(pdf_path: Path):
     print_subsection("2. PARSING DEL TEXTO")
     
     try:
-        parser = MercadonaTicketParser(text)
         ticket = parser.parse()
         
         print(f"✅ Ticket parseado exitosamente")
@@ -14,17 +14,13 @@ import tempfile
 from pathlib import Path
 from typing import Optional
 
-# Añadir el directorio raíz al path
-current_dir = Path(__file__).parent
-root_dir = current_dir.parent if current_dir.name == 'src' else current_dir
-sys.path.insert(0, str(root_dir))
+# El paquete se importa instalado (pip install -e .), igual que main.py
+from mercagasto.processors.mercadona_api_client import MercadonaAPIClient, MercadonaProductExtractor, load_categories_json
+from mercagasto.storage import MercadonaProductLoader
+from mercagasto.config import setup_logging, get_logger, DatabaseConfig
 
-from src.mercagasto.processors.mercadona_api_client import MercadonaAPIClient, MercadonaProductExtractor
-from src.mercagasto.storage import MercadonaProductLoader
-from src.mercagasto.config import setup_logging, get_logger, DatabaseConfig
-
-# Configurar logging
-setup_logging()
+# El logging se configura en main() tras leer los argumentos: con --help no
+# hace falta crear el directorio ni abrir los ficheros de log
 logger = get_logger(__name__)
 
 
@@ -75,13 +71,11 @@ def extract_and_load_products(category_ids: Optional[list] = None,
         
         # Cargar categorías si no se especificaron
         if not category_ids:
-            import json
-            categories_file = root_dir / "src" / "mercagasto" / "storage" / "data" / "categorias.json"
-            
             try:
-                with open(categories_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                category_ids = [cat['id'] for cat in data.get('results', [])]
+                # Solo se necesitan los IDs de primer nivel; el JSON incluido en
+                # el paquete se decodifica una vez por proceso y se comparte
+                data = load_categories_json()
+                category_ids = [cat['id'] for cat in data.get('results', []) if cat.get('id')]
                 logger.info(f"   📂 Cargadas {len(category_ids)} categorías desde JSON")
             except Exception as e:
                 logger.error(f"   ❌ Error cargando categorías: {e}")
@@ -251,11 +245,14 @@ Ejemplos de uso:
     
     args = parser.parse_args()
     
+    # Configurar logging
+    setup_logging()
+    
     # Procesar categorías específicas si se proporcionaron
     category_ids = None
     if args.categories:
         try:
-            category_ids = [int(x.strip()) for x in args.categories.split(',')]
+            category_ids = list(map(int, args.categories.split(',')))  # int() ya ignora los espacios
             logger.info(f"Procesando categorías específicas: {category_ids}")
         except ValueError as e:
             logger.error(f"Error en formato de categorías: {e}")
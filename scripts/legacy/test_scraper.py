@@ -14,8 +14,7 @@ sys.path.insert(0, str(root_dir))
 from src.mercagasto.processors.mercadona_api_client import MercadonaAPIClient, MercadonaProductExtractor
 from src.mercagasto.config import setup_logging, get_logger
 
-# Configurar logging
-setup_logging()
+# El logging se configura al ejecutar el script, no al importarlo
 logger = get_logger(__name__)
 
 
@@ -93,20 +92,27 @@ def test_single_subcategory():
     if all_products:
         print("\n📈 Estadísticas:")
         
-        # Precios
-        prices = [float(p['unit_price']) for p in all_products if p.get('unit_price') and p['unit_price'] != 'N/A']
+        # Precios, empaques y ofertas en una sola pasada sobre los productos
+        prices = []
+        unique_packages = set()
+        decreased = 0
+        for p in all_products:
+            if p.get('unit_price') and p['unit_price'] != 'N/A':
+                prices.append(float(p['unit_price']))
+            if p.get('packaging'):
+                unique_packages.add(p['packaging'])
+            if p.get('price_decreased'):
+                decreased += 1
+        
         if prices:
             print(f"💰 Precios: min={min(prices):.2f}€, max={max(prices):.2f}€, avg={sum(prices)/len(prices):.2f}€")
         
         # Marcas/packaging
-        packages = [p['packaging'] for p in all_products if p.get('packaging')]
-        if packages:
-            unique_packages = set(packages)
+        if unique_packages:
             print(f"📦 Tipos de empaque: {', '.join(unique_packages)}")
         
         # Productos en oferta
-        decreased = [p for p in all_products if p.get('price_decreased')]
-        print(f"🔥 Productos con precio reducido: {len(decreased)}")
+        print(f"🔥 Productos con precio reducido: {decreased}")
     
     # Guardar muestra en archivo
     output_file = "test_productos_subcategoria_161.json"
@@ -149,6 +155,9 @@ def test_category_structure():
 
 
 if __name__ == "__main__":
+    # Configurar logging
+    setup_logging()
+    
     print("🚀 Iniciando pruebas del scraper de Mercadona\n")
     
     # Ejecutar pruebas
@@ -7,11 +7,17 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
+# Evita añadir de nuevo los handlers al logger raíz si setup_logging se llama varias veces
+_LOGGING_CONFIGURED = False
+
 
 def setup_logging(log_dir: str = 'logs', log_level: int = logging.INFO) -> logging.Logger:
     """
     Configura el sistema de logging con handlers para archivos y consola.
     
+    Solo la primera llamada configura los handlers; las siguientes devuelven
+    el logger raíz ya configurado.
+    
     Args:
         log_dir: Directorio donde guardar los archivos de log
         log_level: Nivel de logging para consola
@@ -19,6 +25,10 @@ def setup_logging(log_dir: str = 'logs', log_level: int = logging.INFO) -> loggi
     Returns:
         Logger configurado
     """
+    global _LOGGING_CONFIGURED
+    if _LOGGING_CONFIGURED:
+        return logging.getLogger()
+    
     Path(log_dir).mkdir(exist_ok=True)
     
     # Formato detallado
@@ -55,6 +65,7 @@ def setup_logging(log_dir: str = 'logs', log_level: int = logging.INFO) -> loggi
     root_logger.addHandler(error_handler)
     root_logger.addHandler(console_handler)
     
+    _LOGGING_CONFIGURED = True
     return root_logger
 
 
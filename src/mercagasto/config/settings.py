@@ -5,7 +5,7 @@ Configuración del sistema.
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 
 # Cargar variables de entorno desde .env
 try:
@@ -27,6 +27,9 @@ class DatabaseConfig:
     sslmode: str = 'prefer'
     connect_timeout: int = 30
     application_name: str = 'mercagasto-batch'
+    pool_min_size: int = 2
+    pool_max_size: int = 4
+    keepalives_idle: int = 60
     
     @classmethod
     def from_env(cls) -> 'DatabaseConfig':
@@ -39,7 +42,10 @@ class DatabaseConfig:
             password=os.getenv('DB_PASSWORD', 'postgres'),
             sslmode=os.getenv('DB_SSLMODE', 'prefer'),
             connect_timeout=int(os.getenv('DB_CONNECT_TIMEOUT', '30')),
-            application_name=os.getenv('DB_APP_NAME', 'mercagasto-batch')
+            application_name=os.getenv('DB_APP_NAME', 'mercagasto-batch'),
+            pool_min_size=int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            pool_max_size=int(os.getenv('DB_POOL_MAX_SIZE', '4')),
+            keepalives_idle=int(os.getenv('DB_KEEPALIVES_IDLE', '60'))
         )
     
     @classmethod
@@ -56,8 +62,30 @@ class DatabaseConfig:
             password=url.password or 'postgres',
             sslmode='require' if 'render' in (url.hostname or '') else 'prefer',
             connect_timeout=30,
-            application_name='mercagasto-batch'
+            application_name='mercagasto-batch',
+            pool_min_size=int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            pool_max_size=int(os.getenv('DB_POOL_MAX_SIZE', '4')),
+            keepalives_idle=int(os.getenv('DB_KEEPALIVES_IDLE', '60'))
         )
+    
+    def connection_params(self) -> Dict[str, Any]:
+        """Parámetros de psycopg2.connect (o de un pool) para esta configuración."""
+        return {
+            'host': self.host,
+            'port': self.port,
+            'database': self.database,
+            'user': self.user,
+            'password': self.password,
+            'sslmode': self.sslmode,
+            'connect_timeout': self.connect_timeout,
+            'application_name': self.application_name,
+            # Keepalives TCP: las conexiones de un pool pasan tiempo ociosas y sin
+            # ellos un firewall/NAT puede cortarlas sin que el cliente se entere
+            'keepalives': 1,
+            'keepalives_idle': self.keepalives_idle,
+            'keepalives_interval': 10,
+            'keepalives_count': 3
+        }
 
 
 def get_database_config() -> DatabaseConfig:
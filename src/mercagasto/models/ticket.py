@@ -2,7 +2,7 @@
 Modelos de datos principales del sistema.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 
@@ -99,4 +99,23 @@ class TicketData:
 
     def get_total_quantity(self) -> int:
         """Obtiene la cantidad total de todos los productos."""
-        return sum(product.quantity for product in self.products)
\ No newline at end of file
+        return sum(product.quantity for product in self.products)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte el ticket a un diccionario serializable en JSON (fecha como YYYY-MM-DD)."""
+        return {
+            'store_name': self.store_name,
+            'cif': self.cif,
+            'address': self.address,
+            'postal_code': self.postal_code,
+            'city': self.city,
+            'phone': self.phone,
+            'date': self.date.strftime('%Y-%m-%d') if self.date else None,
+            'time': self.time,
+            'order_number': self.order_number,
+            'invoice_number': self.invoice_number,
+            'total': self.total,
+            'payment_method': self.payment_method,
+            'products': [asdict(product) for product in self.products],
+            'iva_breakdown': self.iva_breakdown
+        }
\ No newline at end of file
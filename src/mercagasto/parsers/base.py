@@ -5,6 +5,7 @@ Parser base para tickets de supermercado.
 import re
 from abc import ABC, abstractmethod
 from datetime import datetime
+from functools import cached_property
 from typing import Optional, List
 
 from ..models import TicketData, Product
@@ -12,6 +13,10 @@ from ..config import get_logger
 
 logger = get_logger(__name__)
 
+# Patrones comunes a todos los parsers, compilados una sola vez
+_RE_PRECIO = re.compile(r'(\d+,\d+)')
+_RE_FECHA = re.compile(r'(\d{2}/\d{2}/\d{4})')
+
 
 class TicketParserBase(ABC):
     """Clase base abstracta para parsers de tickets."""
@@ -55,6 +60,11 @@ class TicketParserBase(ABC):
         """Limpia y normaliza texto."""
         return text.strip() if text else ""
     
+    @cached_property
+    def clean_lines(self) -> List[str]:
+        """Líneas del ticket ya limpiadas; se calculan una sola vez por parser."""
+        return [self._clean_text(line) for line in self.lines]
+    
     def _extract_price(self, text: str) -> Optional[float]:
         """
         Extrae precio de un texto.
@@ -65,7 +75,7 @@ class TicketParserBase(ABC):
         Returns:
             Precio como float o None si no se encuentra
         """
-        match = re.search(r'(\d+,\d+)', text)
+        match = _RE_PRECIO.search(text)
         if match:
             return float(match.group(1).replace(',', '.'))
         return None
@@ -81,7 +91,7 @@ class TicketParserBase(ABC):
         Returns:
             Objeto datetime o None si no se puede parsear
         """
-        date_match = re.search(r'(\d{2}/\d{2}/\d{4})', text)
+        date_match = _RE_FECHA.search(text)
         if date_match:
             try:
                 return datetime.strptime(date_match.group(1), format_str)
@@ -12,6 +12,28 @@ from ..config import get_logger
 
 logger = get_logger(__name__)
 
+# Patrones de cabecera, productos e IVA, compilados una sola vez al importar el módulo
+_RE_CIF = re.compile(r'MERCADONA.*?A-(\d+)')
+_RE_CODIGO_POSTAL = re.compile(r'\d{5}\s+\w+')
+_RE_TELEFONO = re.compile(r'(\d{9})')
+_RE_FECHA_HORA = re.compile(r'\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}')
+_RE_OPERACION = re.compile(r'OP:\s*(\d+)')
+_RE_PESO = re.compile(r'([0-9]+,[0-9]{3})\s*kg\s*([0-9]+,[0-9]{2})\s*€/kg\s*([0-9]+,[0-9]{2})')
+_RE_PRECIO = re.compile(r'^\d+,\d+$')
+_RE_PESO_KG = re.compile(r'(\d+,\d+)\s*kg')
+_RE_TIPO_IVA = re.compile(r'\d+%')
+
+# Patrones del número de factura, compilados una sola vez al importar el módulo
+_RE_FACTURA_GUIONES = re.compile(r'(\d+-\d+-\d+)')
+_RE_FACTURA_NUMERO = re.compile(r'FACTURA:\s*(\d+)')
+_RE_FACTURA_ETIQUETA = re.compile(r'Nº\s*(?:FACTURA|FAC):', re.IGNORECASE)
+_RE_FACTURA_GENERICO = re.compile(r'(\d+-\d+-\d+|\d+)')
+# Candidatos a número de factura en la búsqueda de depuración.
+# 'FACTURA' contiene 'FAC', así que basta con buscar FAC o INVOICE.
+_RE_DEBUG_PALABRAS_FACTURA = re.compile(r'FAC|INVOICE', re.IGNORECASE)
+_RE_DEBUG_GUIONES = re.compile(r'\d{3,}-\d+-\d+')
+_RE_DEBUG_NUMERO_LARGO = re.compile(r'\d{8,}')
+
 
 class MercadonaTicketParser(TicketParserBase):
     """Parser especializado para tickets de Mercadona."""
@@ -68,18 +90,20 @@ class MercadonaTicketParser(TicketParserBase):
         """Debug para buscar posibles números de factura en el texto."""
         logger.debug("=== DEBUG: Búsqueda de número de factura ===")
         
-        for i, line in enumerate(self.lines, 1):
-            line_clean = self._clean_text(line)
-            
+        for i, line_clean in enumerate(self.clean_lines, 1):
             # Buscar líneas que contengan palabras relacionadas con factura
-            if any(keyword in line_clean.upper() for keyword in ['FACTURA', 'FAC', 'INVOICE']):
+            if _RE_DEBUG_PALABRAS_FACTURA.search(line_clean):
                 logger.debug(f"Línea {i}: {line_clean}")
             
-            # Buscar patrones de números que podrían ser facturas
-            if re.search(r'\d{3,}-\d+-\d+', line_clean):
+            # Buscar patrones de números que podrían ser facturas; ninguno cabe
+            # en menos de 7 caracteres, así que las líneas cortas no se analizan
+            if len(line_clean) < 7:
+                continue
+            
+            if _RE_DEBUG_GUIONES.search(line_clean):
                 logger.debug(f"Patrón XXX-X-X en línea {i}: {line_clean}")
             
-            if re.search(r'\d{8,}', line_clean):
+            if _RE_DEBUG_NUMERO_LARGO.search(line_clean):
                 logger.debug(f"Número largo en línea {i}: {line_clean}")
         
         logger.debug("=== FIN DEBUG ===")
@@ -87,12 +111,15 @@ class MercadonaTicketParser(TicketParserBase):
     
     def _parse_store_info(self, ticket: TicketData) -> None:
         """Extrae información de la tienda Mercadona."""
-        for line in self.lines:
-            line = self._clean_text(line)
+        for line in self.clean_lines:
+            # Filtro literal barato: los patrones anclados de código postal y
+            # fecha empiezan por dígito (isdigit acepta todo lo que acepta \d),
+            # así que el resto de líneas no llega a ejecutar esas regex
+            empieza_por_digito = line[:1].isdigit()
             
             # Nombre y CIF de Mercadona
             if "MERCADONA" in line and "A-" in line:
-                match = re.search(r'MERCADONA.*?A-(\d+)', line)
+                match = _RE_CIF.search(line)
                 if match:
                     ticket.store_name = "MERCADONA, S.A."
                     ticket.cif = f"A-{match.group(1)}"
@@ -102,19 +129,19 @@ class MercadonaTicketParser(TicketParserBase):
                 ticket.address = line
             
             # Código postal y ciudad
-            elif re.match(r'\d{5}\s+\w+', line):
+            elif empieza_por_digito and _RE_CODIGO_POSTAL.match(line):
                 parts = line.split()
                 ticket.postal_code = parts[0]
                 ticket.city = ' '.join(parts[1:])
             
             # Teléfono
             elif "TELÉFONO:" in line:
-                match = re.search(r'(\d{9})', line)
+                match = _RE_TELEFONO.search(line)
                 if match:
                     ticket.phone = match.group(1)
             
             # Fecha y hora
-            elif re.match(r'\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}', line):
+            elif empieza_por_digito and _RE_FECHA_HORA.match(line):
                 parts = line.split()
                 if len(parts) >= 2:
                     ticket.date = self._extract_date(parts[0]) # type: ignore
@@ -122,41 +149,41 @@ class MercadonaTicketParser(TicketParserBase):
             
             # Número de operación
             elif "OP:" in line:
-                match = re.search(r'OP:\s*(\d+)', line)
+                match = _RE_OPERACION.search(line)
                 if match:
                     ticket.order_number = match.group(1)
             
             # Número de factura - Múltiples patrones
             elif "FACTURA SIMPLIFICADA:" in line:
                 # Patrón: FACTURA SIMPLIFICADA: 123-456-789
-                match = re.search(r'(\d+-\d+-\d+)', line)
+                match = _RE_FACTURA_GUIONES.search(line)
                 if match:
                     ticket.invoice_number = match.group(1)
             elif "FACTURA:" in line:
                 # Patrón: FACTURA: 123456789
-                match = re.search(r'FACTURA:\s*(\d+)', line)
+                match = _RE_FACTURA_NUMERO.search(line)
                 if match:
                     ticket.invoice_number = match.group(1)
-            elif re.search(r'Nº\s*(?:FACTURA|FAC):', line, re.IGNORECASE):
+            elif "º" in line and _RE_FACTURA_ETIQUETA.search(line):
                 # Patrón: Nº FACTURA: 123-456-789
-                match = re.search(r'(\d+-\d+-\d+|\d+)', line)
+                match = _RE_FACTURA_GENERICO.search(line)
                 if match:
                     ticket.invoice_number = match.group(1)
-            elif re.search(r'(\d+-\d+-\d+)', line) and not ticket.invoice_number:
+            elif not ticket.invoice_number and not ticket.products:
                 # Patrón genérico de números con guiones (como último recurso)
-                # Solo si no hay productos parseados aún para evitar falsos positivos
-                if not ticket.products:
-                    match = re.search(r'(\d+-\d+-\d+)', line)
-                    if match:
-                        ticket.invoice_number = match.group(1)
+                # Solo si no hay productos parseados aún para evitar falsos positivos.
+                # Las comprobaciones baratas van primero y la línea se busca una sola vez.
+                match = _RE_FACTURA_GUIONES.search(line)
+                if match:
+                    ticket.invoice_number = match.group(1)
     
     def _parse_products(self, ticket: TicketData) -> None:
         """Extrae los productos del ticket de Mercadona, incluyendo los que vienen en dos líneas (descripción y luego peso/precio, o al revés)."""
         in_products = False
-        lines = self.lines
+        lines = self.clean_lines
         i = 0
         while i < len(lines):
-            line = self._clean_text(lines[i])
+            line = lines[i]
 
             # Detectar inicio de productos
             if "Descripción" in line and "Importe" in line:
@@ -179,9 +206,8 @@ class MercadonaTicketParser(TicketParserBase):
             if product:
                 # Verificar si la siguiente línea es información de peso/precio al peso
                 if i + 1 < len(lines):
-                    next_line = self._clean_text(lines[i + 1])
-                    peso_match = re.match(
-                        r'([0-9]+,[0-9]{3})\s*kg\s*([0-9]+,[0-9]{2})\s*€/kg\s*([0-9]+,[0-9]{2})', next_line)
+                    next_line = lines[i + 1]
+                    peso_match = _RE_PESO.match(next_line)
                     if peso_match:
                         product.weight = peso_match.group(1) + ' kg'
                         product.unit_price = float(peso_match.group(2).replace(',', '.'))
@@ -193,10 +219,9 @@ class MercadonaTicketParser(TicketParserBase):
                 continue
 
             # Caso 2: Peso/precio seguido de descripción/cantidad
-            peso_match = re.match(
-                r'([0-9]+,[0-9]{3})\s*kg\s*([0-9]+,[0-9]{2})\s*€/kg\s*([0-9]+,[0-9]{2})', line)
+            peso_match = _RE_PESO.match(line)
             if peso_match and i > 0:
-                prev_line = self._clean_text(lines[i - 1])
+                prev_line = lines[i - 1]
                 prev_parts = prev_line.split()
                 if len(prev_parts) >= 2:
                     try:
@@ -242,7 +267,7 @@ class MercadonaTicketParser(TicketParserBase):
         price_indices = []
         for i, part in enumerate(parts):
             # Verificar que sea un número con coma y no contenga letras
-            if re.match(r'^\d+,\d+$', part):
+            if _RE_PRECIO.match(part):
                 prices.append(float(part.replace(',', '.')))
                 price_indices.append(i)
         
@@ -259,7 +284,7 @@ class MercadonaTicketParser(TicketParserBase):
         # Verificar si hay peso
         weight = None
         if 'kg' in line or '€/kg' in line:
-            weight_match = re.search(r'(\d+,\d+)\s*kg', line)
+            weight_match = _RE_PESO_KG.search(line)
             if weight_match:
                 weight = weight_match.group(1) + ' kg'
         
@@ -295,14 +320,12 @@ class MercadonaTicketParser(TicketParserBase):
     def _parse_iva(self, ticket: TicketData) -> None:
         """Extrae el desglose de IVA."""
         iva_section = False
-        for line in self.lines:
-            line = self._clean_text(line)
-            
+        for line in self.clean_lines:
             if "IVA" in line and "BASE IMPONIBLE" in line:
                 iva_section = True
                 continue
             
-            if iva_section and re.match(r'\d+%', line):
+            if iva_section and _RE_TIPO_IVA.match(line):
                 parts = line.split()
                 if len(parts) >= 3:
                     try:
@@ -6,7 +6,7 @@ from .file_utils import FileProcessor
 from .gmail_client import GmailClient  # Commented out - requires google dependencies
 from .pdf_extractor import PDFTextExtractor  # Commented out - requires pdfplumber
 from .gmail_processor import GmailTicketProcessor  # Commented out - depends on gmail_client
-from .mercadona_api_client import MercadonaAPIClient, MercadonaProductExtractor
+from .mercadona_api_client import MercadonaAPIClient, MercadonaProductExtractor, load_categories_json
 from .product_matcher import ProductMatcher, MatchResult  # Commented out - requires psycopg2
 
 __all__ = [
@@ -16,6 +16,7 @@ __all__ = [
     'GmailTicketProcessor',
     'MercadonaAPIClient',
     'MercadonaProductExtractor',
+    'load_categories_json',
     'ProductMatcher',
     'MatchResult'
 ]
\ No newline at end of file
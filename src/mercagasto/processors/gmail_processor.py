@@ -4,7 +4,7 @@ Procesador principal de tickets desde Gmail.
 
 import json
 import traceback
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
 from .gmail_client import GmailClient
@@ -198,12 +198,11 @@ class GmailTicketProcessor:
                     message_id, attachment['filename'], pdf_hash, pdf_path, sender_email
                 )
 
-                self.storage.register_file_backup(
-                    processing_id, 'pdf', pdf_path, pdf_hash, pdf_size
-                )
-
-            # Procesar PDF
-            result = self._process_single_pdf(pdf_path, message_id, processing_id, sender_email)
+            # Procesar PDF (el backup del PDF se registra junto al del texto)
+            result = self._process_single_pdf(
+                pdf_path, message_id, processing_id, sender_email,
+                pdf_backup=('pdf', pdf_path, pdf_hash, pdf_size)
+            )
 
             # Actualizar estadísticas
             self._update_stats_from_result(result, stats, attachment['filename'])
@@ -216,9 +215,12 @@ class GmailTicketProcessor:
             self.gmail_client.add_label(message_id)
     
     def _process_single_pdf(self, pdf_path: str, message_id: str, 
-                           processing_id: int = None, subscriptor_email: str = None) -> Dict[str, Any]:
+                           processing_id: int = None, subscriptor_email: str = None,
+                           pdf_backup: Optional[Tuple[str, str, str, int]] = None) -> Dict[str, Any]:
         """Procesa un único archivo PDF."""
         result = {'status': 'error', 'error': None, 'ticket_id': None}
+        # Backups pendientes de registrar: se insertan juntos al terminar
+        backups = [pdf_backup] if pdf_backup else []
         
         try:
             # Actualizar estado: extrayendo
@@ -239,9 +241,7 @@ class GmailTicketProcessor:
                 file_hash = FileProcessor.calculate_file_hash(text_path) if text_path else ""
                 
                 if text_path:
-                    self.storage.register_file_backup(
-                        processing_id, 'text', text_path, file_hash, len(text.encode())
-                    )
+                    backups.append(('text', text_path, file_hash, len(text.encode())))
                     self.storage.update_processing_status(
                         processing_id, ProcessingStatus.EXTRACTING, extracted_text_path=text_path
                     )
@@ -298,14 +298,23 @@ class GmailTicketProcessor:
                 
                 result['status'] = 'duplicate'
             else:
-                error_trace = traceback.format_exc()
-                logger.error(f"Error procesando PDF: {error_str}")
-                logger.error(error_trace)
+                # La traza sólo se formatea si algún handler va a emitirla
+                logger.error("Error procesando PDF: %s", error_str, exc_info=True)
                 print(f"  ✗ Error: {error_str}")
                 
                 self._handle_processing_error(processing_id, 'processing', error_str, result)
                 self.file_processor.move_to_failed(pdf_path)
         
+        finally:
+            if backups and processing_id and isinstance(self.storage, PostgreSQLTicketStorage):
+                # Un fallo al registrar los backups no debe cambiar el resultado:
+                # el ticket ya puede estar guardado y el email debe marcarse igual
+                try:
+                    self.storage.register_file_backups(processing_id, backups)
+                except Exception as e:
+                    logger.error("Error registrando backups del procesamiento %s: %s",
+                                 processing_id, e, exc_info=True)
+        
         return result
     
     def _handle_processing_error(self, processing_id: int, stage: str, 
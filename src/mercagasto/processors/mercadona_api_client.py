@@ -3,8 +3,16 @@ Cliente para la API de Mercadona para obtener productos de categorías.
 """
 
 import json
+import os
+import tempfile
+import threading
 import time
-from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from heapq import nlargest
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, List, Any, Optional, TextIO, Tuple
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -14,13 +22,77 @@ from ..models.enums import ProcessingStatus
 
 logger = get_logger(__name__)
 
+# Árbol de categorías de la tienda incluido con el paquete
+CATEGORIES_FILE = Path(__file__).resolve().parent.parent / "storage" / "data" / "categorias.json"
+
+
+@lru_cache(maxsize=4)
+def _load_categories_raw(path: str) -> Dict[str, Any]:
+    """Decodifica un categorias.json; memorizado por ruta canónica."""
+    with open(path, 'rb') as f:
+        return json.loads(f.read())
+
+
+def load_categories_json(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Devuelve el JSON de categorías, leyéndolo del disco una sola vez por proceso.
+    
+    El diccionario devuelto se comparte entre llamadas: no debe modificarse.
+    
+    Args:
+        path: Ruta al JSON de categorías (por defecto, el incluido en el paquete)
+        
+    Returns:
+        Diccionario con la respuesta de categorías ('results' con cada categoría
+        y sus subcategorías en 'categories')
+    """
+    return _load_categories_raw(str(Path(path or CATEGORIES_FILE).resolve()))
+
+
+class _RateLimiter:
+    """
+    Espacia el inicio de operaciones compartidas entre hilos.
+    
+    Cada llamada a wait() reserva el siguiente hueco libre, separado
+    ``interval`` segundos del anterior, y duerme solo hasta él: el tiempo que
+    dura la propia petición cuenta para el intervalo, a diferencia de una
+    pausa fija tras cada una.
+    """
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+    
+    def wait(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
 
 class MercadonaAPIClient:
     """Cliente para interactuar con la API de Mercadona."""
     
     BASE_URL = "https://tienda.mercadona.es/api"
     
-    def __init__(self, lang: str = "es", timeout: int = 30, max_retries: int = 3):
+    # Conexiones keep-alive que el pool conserva abiertas hacia la API. Debe
+    # cubrir los hilos de MercadonaProductExtractor.extract_all_products (y sus
+    # subcategorías); por debajo, urllib3 descarta las conexiones sobrantes y
+    # las siguientes peticiones vuelven a pagar el handshake TLS.
+    POOL_MAXSIZE = 16
+    
+    # Separación mínima entre peticiones a la API de todos los hilos juntos;
+    # equivale a la antigua pausa de 0.5s por subcategoría con 4 hilos.
+    REQUEST_INTERVAL = 0.125
+    
+    def __init__(self, lang: str = "es", timeout: int = 30, max_retries: int = 3,
+                 cache_dir: Optional[str] = None, cache_ttl: int = 24 * 3600,
+                 refresh_cache: bool = False, request_interval: float = REQUEST_INTERVAL):
         """
         Inicializa el cliente de la API de Mercadona.
         
@@ -28,11 +100,26 @@ class MercadonaAPIClient:
             lang: Idioma para las consultas (por defecto 'es')
             timeout: Timeout para las peticiones en segundos
             max_retries: Número máximo de reintentos
+            cache_dir: Directorio para cachear en disco las respuestas por
+                categoría (None desactiva la caché)
+            cache_ttl: Segundos durante los que una respuesta cacheada se usa
+                sin consultar la API
+            refresh_cache: Si True, ignora la vigencia de la caché y vuelve a
+                consultar la API (reutilizando el ETag si lo hay)
+            request_interval: Segundos mínimos entre peticiones a la API
+                (las respuestas servidas desde caché no esperan)
         """
         self.lang = lang
         self.timeout = timeout
         self.max_retries = max_retries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.cache_ttl = cache_ttl
+        self.refresh_cache = refresh_cache
         self.session = self._create_session()
+        self._limiter = _RateLimiter(request_interval)
+        
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"Cliente de API Mercadona inicializado (idioma: {lang})")
     
@@ -48,7 +135,12 @@ class MercadonaAPIClient:
             allowed_methods=["HEAD", "GET", "OPTIONS"]
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # Todas las peticiones van al mismo host, así que basta con pocos pools
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy,
+            pool_connections=2,
+            pool_maxsize=self.POOL_MAXSIZE
+        )
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         
@@ -58,12 +150,87 @@ class MercadonaAPIClient:
             'Accept': 'application/json',
             'Accept-Language': f'{self.lang},en;q=0.9',
             'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
             'Cache-Control': 'no-cache',
             'Pragma': 'no-cache'
         })
         
         return session
     
+    def _cache_file(self, category_id: int) -> Path:
+        """Ruta del fichero de caché de una categoría para el idioma del cliente."""
+        return self.cache_dir / f"{category_id}_{self.lang}.json"
+    
+    def _fetch_category_json(self, category_id: int, use_cache: bool = True) -> Any:
+        """
+        Descarga el JSON de /categories/{id}/, pasando por la caché en disco.
+        
+        Una entrada con menos de ``cache_ttl`` segundos se devuelve sin tocar la
+        red. Si ha caducado (o se pide refrescar) y guarda ETag, la petición va
+        con If-None-Match y un 304 reutiliza el cuerpo cacheado. Los errores de
+        red y de decodificación se propagan igual que sin caché.
+        
+        Args:
+            category_id: ID de la categoría o subcategoría
+            use_cache: Si False, consulta siempre la API sin leer ni escribir caché
+            
+        Returns:
+            JSON decodificado de la respuesta
+        """
+        url = f"{self.BASE_URL}/categories/{category_id}/"
+        params = {"lang": self.lang}
+        
+        if not (use_cache and self.cache_dir):
+            self._limiter.wait()
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        
+        cache_file = self._cache_file(category_id)
+        cached = None
+        age = 0.0
+        try:
+            with open(cache_file, 'rb') as f:
+                cached = json.loads(f.read())
+            age = time.time() - os.path.getmtime(cache_file)
+        except (OSError, ValueError):
+            cached = None
+        if not (isinstance(cached, dict) and 'data' in cached):
+            cached = None
+        
+        if cached is not None and not self.refresh_cache and age < self.cache_ttl:
+            logger.debug(f"Categoría {category_id} servida desde caché")
+            return cached['data']
+        
+        headers = {}
+        if cached is not None and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        
+        self._limiter.wait()
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        
+        if response.status_code == 304 and cached is not None:
+            # Sin cambios en la API: se renueva la vigencia de la entrada
+            logger.debug(f"Categoría {category_id} sin cambios (304), reutilizando caché")
+            os.utime(cache_file)
+            return cached['data']
+        
+        response.raise_for_status()
+        data = response.json()
+        
+        # Escritura atómica: varios hilos del extractor pueden escribir a la vez
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'etag': response.headers.get('ETag'), 'data': data}, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_file)
+        except OSError as e:
+            logger.warning(f"No se pudo cachear la categoría {category_id}: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        
+        return data
+    
     def get_category_products(self, category_id: int) -> Optional[Dict[str, Any]]:
         """
         Obtiene los productos de una categoría específica.
@@ -75,20 +242,10 @@ class MercadonaAPIClient:
             Diccionario con la información de la categoría y sus productos,
             o None si hay error
         """
-        url = f"{self.BASE_URL}/categories/{category_id}/"
-        params = {"lang": self.lang}
-        
         try:
             logger.info(f"Obteniendo productos de categoría {category_id}")
             
-            response = self.session.get(
-                url, 
-                params=params, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._fetch_category_json(category_id)
             
             # Validar estructura básica
             if not isinstance(data, dict):
@@ -110,31 +267,22 @@ class MercadonaAPIClient:
             logger.error(f"Error inesperado obteniendo categoría {category_id}: {e}")
             return None
     
-    def get_subcategory_products(self, subcategory_id: int) -> Optional[Dict[str, Any]]:
+    def get_subcategory_products(self, subcategory_id: int, use_cache: bool = True) -> Optional[Dict[str, Any]]:
         """
         Obtiene los productos de una subcategoría específica.
         
         Args:
             subcategory_id: ID de la subcategoría
+            use_cache: Si False, consulta la API aunque haya caché en disco
             
         Returns:
             Diccionario con los productos de la subcategoría,
             o None si hay error
         """
-        url = f"{self.BASE_URL}/categories/{subcategory_id}/"
-        params = {"lang": self.lang}
-        
         try:
             logger.debug(f"Obteniendo productos de subcategoría {subcategory_id}")
             
-            response = self.session.get(
-                url, 
-                params=params, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._fetch_category_json(subcategory_id, use_cache)
             
             # Validar estructura básica
             if not isinstance(data, dict):
@@ -188,14 +336,13 @@ class MercadonaAPIClient:
                 subcategory_id = subcategory.get('id')
                 
                 if subcategory_id:
-                    # Pequeña pausa para evitar sobrecargar la API
-                    time.sleep(0.5)
-                    
+                    # El ritmo de peticiones lo marca el limitador del cliente
                     subcategory_data = self.get_subcategory_products(subcategory_id)
                     
                     if subcategory_data:
                         # Los productos están en subcategorías anidadas
                         nested_categories = subcategory_data.get('categories', [])
+                        productos_previos = len(all_products)
                         
                         for nested_cat in nested_categories:
                             products = nested_cat.get('products', [])
@@ -211,7 +358,8 @@ class MercadonaAPIClient:
                             
                             all_products.extend(products)
                         
-                        total_products = sum(len(cat.get('products', [])) for cat in nested_categories)
+                        # Lo añadido en esta subcategoría, sin volver a recorrer las anidadas
+                        total_products = len(all_products) - productos_previos
                         logger.info(f"Subcategoría '{subcategory.get('name', 'Sin nombre')}' ({subcategory_id}): {total_products} productos")
         
         total_products = len(all_products)
@@ -229,7 +377,8 @@ class MercadonaAPIClient:
         try:
             # Probar con una subcategoría conocida (aceite, vinagre y sal)
             test_category_id = 112
-            result = self.get_subcategory_products(test_category_id)
+            # Sin caché: se trata de comprobar que la API responde
+            result = self.get_subcategory_products(test_category_id, use_cache=False)
             
             if result:
                 logger.info("✓ Conexión con API de Mercadona exitosa")
@@ -266,6 +415,7 @@ class MercadonaProductExtractor:
             'subcategories_processed': 0,
             'total_products': 0,
             'errors': 0,
+            'category_products': {},
             'start_time': None,
             'end_time': None
         }
@@ -341,64 +491,181 @@ class MercadonaProductExtractor:
             logger.error(f"Error extrayendo información del producto {product_data.get('id', 'desconocido')}: {e}")
             return {}
     
-    def extract_all_products(self, category_ids: List[int], delay_between_categories: float = 2.0, treat_as_subcategories: bool = False) -> List[Dict[str, Any]]:
+    def extract_all_products(self, category_ids: List[int], delay_between_categories: float = 2.0, treat_as_subcategories: bool = False, max_workers: int = 4, ndjson_file: Optional[str] = None, resume: bool = False, top_categories: int = 20) -> List[Dict[str, Any]]:
         """
         Extrae productos de múltiples categorías.
         
+        Las categorías se descargan en paralelo con hasta ``max_workers`` hilos
+        que comparten la sesión HTTP del cliente. El inicio de cada categoría
+        se espacia ``delay_between_categories / max_workers`` segundos, así que
+        el ritmo total queda acotado por ``max_workers / delay_between_categories``
+        sin dormir tras la última. Los productos se devuelven en el orden de
+        ``category_ids``.
+        
+        Con ``ndjson_file`` los productos de cada categoría se vuelcan al archivo
+        (un producto por línea) en cuanto se procesa y no se acumulan en
+        memoria; lo ya escrito se conserva aunque la extracción se interrumpa.
+        Con ``resume`` se continúa ese archivo en lugar de sobrescribirlo y se
+        omiten las categorías que ya contiene.
+        
         Args:
             category_ids: Lista de IDs de categorías a procesar
-            delay_between_categories: Pausa entre categorías en segundos
+            delay_between_categories: Separación entre categorías en segundos (por hilo)
             treat_as_subcategories: Si True, trata los IDs como subcategorías directamente
+            max_workers: Número máximo de categorías descargándose a la vez
+            ndjson_file: Archivo NDJSON al que volcar los productos por categoría
+            resume: Si True, reanuda una extracción previa en ``ndjson_file``
+            top_categories: Número de categorías con más productos a mostrar
+                en el resumen final
             
         Returns:
-            Lista con todos los productos extraídos
+            Lista con todos los productos extraídos (vacía si se vuelcan a
+            ``ndjson_file``; el recuento queda en extraction_stats)
         """
         self.extraction_stats['start_time'] = time.time()
         self.extracted_products = []
         
         logger.info(f"🚀 Iniciando extracción de {len(category_ids)} {'subcategorías' if treat_as_subcategories else 'categorías'}")
         
-        for i, category_id in enumerate(category_ids, 1):
-            try:
-                logger.info(f"📂 Procesando {'subcategoría' if treat_as_subcategories else 'categoría'} {category_id} ({i}/{len(category_ids)})")
-                
-                if treat_as_subcategories:
-                    # Tratar directamente como subcategoría
-                    products = self.extract_subcategory_products(category_id)
-                else:
-                    # Obtener todos los productos de la categoría (modo original)
-                    category_data, products = self.api_client.get_all_category_products(category_id)
-                
-                if not products:
-                    logger.warning(f"No se encontraron productos en {'subcategoría' if treat_as_subcategories else 'categoría'} {category_id}")
-                    self.extraction_stats['errors'] += 1
-                    continue
-                
-                # Procesar cada producto
-                for product in products:
-                    extracted_product = self.extract_product_info(product)
-                    if extracted_product:
-                        self.extracted_products.append(extracted_product)
-                
-                self.extraction_stats['categories_processed'] += 1
-                self.extraction_stats['total_products'] += len(products)
-                
-                logger.info(f"✅ {'Subcategoría' if treat_as_subcategories else 'Categoría'} {category_id}: {len(products)} productos extraídos")
-                
-                # Pausa entre categorías para evitar sobrecargar la API
-                if i < len(category_ids):
-                    logger.debug(f"Pausa de {delay_between_categories}s antes de la siguiente categoría")
-                    time.sleep(delay_between_categories)
-                    
-            except Exception as e:
-                logger.error(f"Error procesando {'subcategoría' if treat_as_subcategories else 'categoría'} {category_id}: {e}")
-                self.extraction_stats['errors'] += 1
-                continue
+        modo = 'w'
+        if resume and ndjson_file and os.path.exists(ndjson_file):
+            id_field = 'subcategory_id' if treat_as_subcategories else 'category_id'
+            completadas = self._resume_ndjson(ndjson_file, id_field)
+            productos = sum(completadas.values())
+            category_ids = [cid for cid in category_ids if cid not in completadas]
+            self.extraction_stats['categories_processed'] += len(completadas)
+            self.extraction_stats['total_products'] += productos
+            self.extraction_stats['category_products'].update(completadas)
+            logger.info(f"⏩ Reanudando {ndjson_file}: {len(completadas)} ya extraídas ({productos} productos), quedan {len(category_ids)}")
+            modo = 'a'
+        
+        salida = open(ndjson_file, modo, encoding='utf-8') if ndjson_file else None
+        
+        try:
+            self._extract_categories(category_ids, delay_between_categories, treat_as_subcategories, max_workers, salida)
+        finally:
+            if salida:
+                salida.close()
         
         self.extraction_stats['end_time'] = time.time()
-        self._log_final_stats()
+        self._log_final_stats(top_categories)
         
         return self.extracted_products
+    
+    @staticmethod
+    def _resume_ndjson(ndjson_file: str, id_field: str) -> Dict[Any, int]:
+        """
+        Prepara un NDJSON de una extracción interrumpida para continuarla.
+        
+        Las categorías se escriben en orden y de una en una, así que solo la
+        última del archivo puede haber quedado a medias: se trunca el archivo
+        justo antes de ella (o antes de la primera línea ilegible, o de una
+        categoría que reaparece tras otra) para que se vuelva a descargar entera.
+        
+        Args:
+            ndjson_file: Archivo NDJSON de la extracción previa
+            id_field: Campo del producto con el ID de categoría procesado
+            
+        Returns:
+            Diccionario {ID de categoría completa: productos que se conservan}
+        """
+        completadas = {}
+        actual = None
+        inicio_actual = 0
+        productos_actual = 0
+        offset = 0
+        
+        with open(ndjson_file, 'rb') as f:
+            for line in f:
+                try:
+                    category_id = json.loads(line)[id_field] if line.endswith(b'\n') else None
+                except (ValueError, KeyError, TypeError):
+                    category_id = None
+                if category_id is None or category_id in completadas:
+                    break
+                if category_id != actual:
+                    if actual is not None:
+                        completadas[actual] = productos_actual
+                    actual = category_id
+                    inicio_actual = offset
+                    productos_actual = 0
+                productos_actual += 1
+                offset += len(line)
+        
+        # Se descarta la última categoría leída, completa o no
+        os.truncate(ndjson_file, inicio_actual)
+        return completadas
+    
+    def _extract_categories(self, category_ids: List[int], delay_between_categories: float, treat_as_subcategories: bool, max_workers: int, salida: Optional[TextIO]) -> None:
+        """Descarga las categorías en el pool y procesa sus productos en orden."""
+        tipo = 'subcategoría' if treat_as_subcategories else 'categoría'
+        total = len(category_ids)
+        max_workers = max(1, max_workers)
+        limiter = _RateLimiter(delay_between_categories / max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self._fetch_category, category_id, treat_as_subcategories,
+                    limiter, f"{i}/{total}"
+                )
+                for i, category_id in enumerate(category_ids, 1)
+            ]
+            
+            # Los resultados se consumen en orden desde el hilo principal, que es
+            # el único que toca extracted_products y las estadísticas
+            for category_id, future in zip(category_ids, futures):
+                try:
+                    products = future.result()
+                    
+                    if not products:
+                        logger.warning(f"No se encontraron productos en {tipo} {category_id}")
+                        self.extraction_stats['errors'] += 1
+                        continue
+                    
+                    # Procesar cada producto
+                    extraidos = [p for p in map(self.extract_product_info, products) if p]
+                    if salida:
+                        self._write_ndjson(salida, extraidos)
+                        salida.flush()
+                    else:
+                        self.extracted_products.extend(extraidos)
+                    
+                    self.extraction_stats['categories_processed'] += 1
+                    self.extraction_stats['total_products'] += len(products)
+                    self.extraction_stats['category_products'][category_id] = len(products)
+                    
+                    logger.info(f"✅ {tipo.capitalize()} {category_id}: {len(products)} productos extraídos")
+                        
+                except Exception as e:
+                    logger.error(f"Error procesando {tipo} {category_id}: {e}")
+                    self.extraction_stats['errors'] += 1
+                    continue
+    
+    def _fetch_category(self, category_id: int, treat_as_subcategories: bool, limiter: _RateLimiter, progreso: str) -> List[Dict[str, Any]]:
+        """
+        Descarga los productos de una categoría (se ejecuta en un hilo del pool).
+        
+        Args:
+            category_id: ID de la categoría o subcategoría
+            treat_as_subcategories: Si True, trata el ID como subcategoría directamente
+            limiter: Limitador compartido que espacia el inicio de las categorías
+            progreso: Posición de la categoría en la extracción, para el log
+            
+        Returns:
+            Lista de productos en bruto de la API
+        """
+        # Espera su turno para no sobrecargar la API
+        limiter.wait()
+        logger.info(f"📂 Procesando {'subcategoría' if treat_as_subcategories else 'categoría'} {category_id} ({progreso})")
+        
+        if treat_as_subcategories:
+            # Tratar directamente como subcategoría
+            return self.extract_subcategory_products(category_id)
+        
+        # Obtener todos los productos de la categoría (modo original)
+        category_data, products = self.api_client.get_all_category_products(category_id)
+        return products
 
     def extract_subcategory_products(self, subcategory_id: int) -> List[Dict[str, Any]]:
         """
@@ -438,7 +705,7 @@ class MercadonaProductExtractor:
         
         return all_products
     
-    def _log_final_stats(self):
+    def _log_final_stats(self, top_categories: int = 20):
         """Registra estadísticas finales de la extracción."""
         stats = self.extraction_stats
         duration = stats['end_time'] - stats['start_time']
@@ -452,11 +719,55 @@ class MercadonaProductExtractor:
         if stats['total_products'] > 0:
             rate = stats['total_products'] / duration
             logger.info(f"   🚀 Velocidad: {rate:.2f} productos/segundo")
+        
+        # Solo interesan las primeras: un heap de tamaño K evita ordenarlas todas
+        top = nlargest(top_categories, stats['category_products'].items(), key=itemgetter(1))
+        if top:
+            logger.info(f"   🏆 Top {len(top)} categorías por productos:")
+            for category_id, count in top:
+                logger.info(f"      {category_id}: {count}")
     
     def save_to_json(self, output_file: str) -> bool:
         """
         Guarda los productos extraídos en un archivo JSON.
         
+        Args:
+            output_file: Ruta del archivo de salida
+            
+        Returns:
+            True si se guardó correctamente
+        """
+        try:
+            # Se serializa en memoria y se escribe de una vez: json.dump con
+            # indentación emite el documento en miles de escrituras pequeñas
+            contenido = json.dumps({
+                'extraction_stats': self.extraction_stats,
+                'total_products': len(self.extracted_products),
+                'products': self.extracted_products
+            }, ensure_ascii=False, indent=2)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(contenido)
+            
+            logger.info(f"✅ Productos guardados en: {output_file}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error guardando productos en {output_file}: {e}")
+            return False
+    
+    @staticmethod
+    def _write_ndjson(f: TextIO, products: List[Dict[str, Any]]) -> None:
+        """Escribe los productos como líneas de JSON compacto."""
+        f.write(''.join(json.dumps(product, ensure_ascii=False) + '\n' for product in products))
+    
+    def save_to_ndjson(self, output_file: str) -> bool:
+        """
+        Guarda los productos extraídos en formato NDJSON (un producto por línea).
+        
+        A diferencia de save_to_json no hay documento envolvente: cada línea es
+        un JSON compacto independiente, de modo que quien lo lea (el cargador,
+        jq, pandas con lines=True) puede procesarlo en streaming.
+        
         Args:
             output_file: Ruta del archivo de salida
             
@@ -465,11 +776,7 @@ class MercadonaProductExtractor:
         """
         try:
             with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'extraction_stats': self.extraction_stats,
-                    'total_products': len(self.extracted_products),
-                    'products': self.extracted_products
-                }, f, ensure_ascii=False, indent=2)
+                self._write_ndjson(f, self.extracted_products)
             
             logger.info(f"✅ Productos guardados en: {output_file}")
             return True
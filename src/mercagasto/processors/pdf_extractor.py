@@ -26,11 +26,14 @@ class PDFTextExtractor:
         """
         try:
             with pdfplumber.open(pdf_path) as pdf:
-                text = ""
+                # Se acumulan las páginas y se unen una sola vez, sin copiar
+                # el texto acumulado en cada página
+                pages = []
                 for page in pdf.pages:
                     page_text = page.extract_text()
                     if page_text:
-                        text += page_text + "\n"
+                        pages.append(page_text)
+                text = "\n".join(pages)
                 
                 logger.info(f"Texto extraído del PDF: {len(text)} caracteres")
                 return text.strip() if text else None
@@ -55,9 +58,11 @@ class PDFTextExtractor:
             logger.warning(f"Texto extraído insuficiente: {len(text) if text else 0} caracteres")
             return False
         
-        # Verificar que contenga palabras clave de Mercadona
+        # Verificar que contenga palabras clave de Mercadona (el texto se pasa
+        # a mayúsculas una sola vez, no una vez por palabra clave)
         keywords = ['MERCADONA', 'FACTURA', 'TOTAL']
-        has_keywords = any(keyword in text.upper() for keyword in keywords)
+        text_upper = text.upper()
+        has_keywords = any(keyword in text_upper for keyword in keywords)
         
         if not has_keywords:
             logger.warning("El texto extraído no contiene palabras clave esperadas")
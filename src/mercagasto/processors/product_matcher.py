@@ -8,15 +8,19 @@ múltiples estrategias de coincidencia.
 
 import difflib
 import re
+import threading
 from dataclasses import dataclass
 from typing import List, Optional, Dict, Any, Tuple
 from contextlib import contextmanager
 
 import psycopg2
+import psycopg2.extensions
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 
 from ..config import get_logger
 from ..config.settings import DatabaseConfig
+from ..storage.postgresql import DEC2FLOAT
 
 logger = get_logger(__name__)
 
@@ -51,16 +55,10 @@ class ProductMatcher:
         Args:
             config: Configuración de la base de datos
         """
-        self.connection_params = {
-            'host': config.host,
-            'port': config.port,
-            'database': config.database,
-            'user': config.user,
-            'password': config.password,
-            'sslmode': config.sslmode,
-            'connect_timeout': config.connect_timeout,
-            'application_name': config.application_name
-        }
+        self.connection_params = config.connection_params()
+        self.pool_max_size = config.pool_max_size
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
         
         # Umbrales de confianza para matching
         self.EXACT_MATCH_THRESHOLD = 1.0
@@ -70,18 +68,48 @@ class ProductMatcher:
         
         logger.info("ProductMatcher inicializado")
     
+    def _get_pool(self) -> ThreadedConnectionPool:
+        """Crea el pool de conexiones en el primer uso y lo reutiliza después."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(1, self.pool_max_size, **self.connection_params)
+        return self._pool
+    
     @contextmanager
     def get_connection(self):
-        """Context manager para conexiones a la BD."""
-        conn = psycopg2.connect(**self.connection_params)
+        """
+        Context manager para conexiones a la BD.
+        
+        Cada producto pasa por varias estrategias de matching y una
+        actualización, cada una con su propio bloque de conexión: tomarlas de
+        un pool evita una conexión nueva (TCP, SSL y autenticación) por bloque.
+        """
+        pool = self._get_pool()
+        conn = pool.getconn()
+        if conn.closed:
+            # Conexión caída mientras estaba en el pool: descartarla y pedir otra
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        # Precios NUMERIC como float directamente desde el driver
+        psycopg2.extensions.register_type(DEC2FLOAT, conn)
         try:
             yield conn
         except Exception as e:
-            conn.rollback()
+            if not conn.closed:
+                conn.rollback()
             logger.error(f"Error en conexión de BD: {e}")
             raise e
         finally:
-            conn.close()
+            # putconn revierte la transacción de lectura que quede abierta
+            pool.putconn(conn, close=bool(conn.closed))
+    
+    def close(self) -> None:
+        """Cierra todas las conexiones del pool."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
     
     def categorize_product(self, product_name: str, price: Optional[float] = None) -> MatchResult:
         """
@@ -183,7 +211,10 @@ class ProductMatcher:
         """Busca coincidencias usando similitud de texto."""
         try:
             with self.get_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                # Cursor de servidor: el catálogo completo llega en bloques de
+                # itersize filas en lugar de cargarse entero en memoria
+                with conn.cursor(name='catalogo_fuzzy', cursor_factory=RealDictCursor) as cursor:
+                    cursor.itersize = 1000
                     # Obtener productos similares
                     cursor.execute("""
                         SELECT DISTINCT
@@ -201,7 +232,7 @@ class ProductMatcher:
                     best_match = None
                     best_ratio = 0.0
                     
-                    for row in cursor.fetchall():
+                    for row in cursor:
                         clean_catalog_name = self._clean_product_name(row['display_name'])
                         ratio = difflib.SequenceMatcher(None, product_name, clean_catalog_name).ratio()
                         
@@ -318,8 +349,8 @@ class ProductMatcher:
                     row = cursor.fetchone()
                     if row:
                         # Calcular confianza basada en proximidad del precio
-                        price_diff = float(row['price_diff'])
-                        unit_price = float(row['unit_price'])
+                        price_diff = row['price_diff']
+                        unit_price = row['unit_price']
                         price_similarity = 1 - (price_diff / price)
                         confidence = max(0.5, price_similarity)  # Mínimo 0.5 para price match
                         
@@ -2,28 +2,32 @@
 Formateadores HTML para reportes.
 """
 
+from typing import Tuple
+
 from ..models import WeeklyReport, MonthlyReport
 
 
-class HTMLReportFormatter:
-    """Formateador de reportes a HTML."""
-    
-    @staticmethod
-    def format_weekly_email_html(report: WeeklyReport) -> str:
-        """Genera HTML para email semanal."""
-        
-        # Emoji para tendencia
-        if report.comparacion.diferencia > 0:
-            tendencia = f"📈 +{report.comparacion.porcentaje:.1f}%"
-            color_tendencia = "#e74c3c"
-        elif report.comparacion.diferencia < 0:
-            tendencia = f"📉 {report.comparacion.porcentaje:.1f}%"
-            color_tendencia = "#27ae60"
-        else:
-            tendencia = "➡️ 0%"
-            color_tendencia = "#95a5a6"
-        
-        html = f"""
+# Orden de los días en el bloque de gastos por día del reporte mensual
+_DIAS_ORDEN: Tuple[str, ...] = ('Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom')
+
+# Texto y color de la tendencia según el signo de la diferencia
+_TENDENCIA = {
+    1: ("📈 +{:.1f}%", "#e74c3c"),
+    -1: ("📉 {:.1f}%", "#27ae60"),
+    0: ("➡️ 0%", "#95a5a6"),
+}
+
+
+def _tendencia_style(diferencia: float, porcentaje: float) -> Tuple[str, str]:
+    """Devuelve (texto, color) de la tendencia respecto al período anterior."""
+    signo = (diferencia > 0) - (diferencia < 0)
+    formato, color = _TENDENCIA[signo]
+    return formato.format(porcentaje), color
+
+
+# Plantillas HTML de los reportes. Se rellenan con ``str.format_map`` para no
+# reconstruir los f-strings completos en cada render.
+_WEEKLY_TPL = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -174,9 +178,8 @@ class HTMLReportFormatter:
                 <div class="products">
                     <h3>🏆 Top 5 Productos de la Semana</h3>
         """
-        
-        for i, prod in enumerate(report.top_productos, 1):
-            html += f"""
+
+_WEEKLY_PRODUCT_TPL = """
                     <div class="product-item">
                         <span class="product-name">
                             {i}. {prod.descripcion} 
@@ -185,8 +188,8 @@ class HTMLReportFormatter:
                         <span class="product-amount">{prod.gasto_total:.2f}€</span>
                     </div>
             """
-        
-        html += """
+
+_WEEKLY_FOOTER = """
                 </div>
                 
                 <div class="footer">
@@ -197,25 +200,8 @@ class HTMLReportFormatter:
         </body>
         </html>
         """
-        
-        return html
-    
-    @staticmethod
-    def format_monthly_email_html(report: MonthlyReport) -> str:
-        """Genera HTML para email mensual."""
-        
-        # Emoji para tendencia
-        if report.comparacion.diferencia > 0:
-            tendencia = f"📈 +{report.comparacion.porcentaje:.1f}%"
-            color_tendencia = "#e74c3c"
-        elif report.comparacion.diferencia < 0:
-            tendencia = f"📉 {report.comparacion.porcentaje:.1f}%"
-            color_tendencia = "#27ae60"
-        else:
-            tendencia = "➡️ 0%"
-            color_tendencia = "#95a5a6"
-        
-        html = f"""
+
+_MONTHLY_TPL = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -414,7 +400,7 @@ class HTMLReportFormatter:
                         <p>Ticket promedio</p>
                     </div>
                     <div class="stat-card">
-                        <h3>{len(report.top_productos)}</h3>
+                        <h3>{num_productos}</h3>
                         <p>Productos únicos</p>
                     </div>
                 </div>
@@ -431,9 +417,8 @@ class HTMLReportFormatter:
                     <h3>🏆 Top 10 Productos del Mes</h3>
                     <div class="product-list">
         """
-        
-        for i, prod in enumerate(report.top_productos, 1):
-            html += f"""
+
+_MONTHLY_PRODUCT_TPL = """
                         <div class="product-card">
                             <span class="product-rank">{i}</span>
                             <div class="product-info">
@@ -445,8 +430,8 @@ class HTMLReportFormatter:
                             <span class="product-amount">{prod.gasto_total:.2f}€</span>
                         </div>
             """
-        
-        html += """
+
+_MONTHLY_DAYS_HEADER = """
                     </div>
                 </div>
                 
@@ -454,28 +439,24 @@ class HTMLReportFormatter:
                     <h3>📅 Gastos por Día de la Semana</h3>
                     <div class="day-stats">
         """
-        
-        dias_orden = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
-        for dia in dias_orden:
-            if dia in report.gastos_por_dia:
-                datos = report.gastos_por_dia[dia]
-                html += f"""
+
+_MONTHLY_DAY_TPL = """
                         <div class="day-card">
                             <strong>{dia}</strong>
                             <div class="amount">{datos.total_gastado:.0f}€</div>
                             <div class="count">{datos.num_compras} compras</div>
                         </div>
                 """
-            else:
-                html += f"""
+
+_MONTHLY_EMPTY_DAY_TPL = """
                         <div class="day-card" style="opacity: 0.5;">
                             <strong>{dia}</strong>
                             <div class="amount">0€</div>
                             <div class="count">0 compras</div>
                         </div>
                 """
-        
-        html += """
+
+_MONTHLY_FOOTER = """
                     </div>
                 </div>
                 
@@ -489,5 +470,65 @@ class HTMLReportFormatter:
         </body>
         </html>
         """
+
+
+class HTMLReportFormatter:
+    """Formateador de reportes a HTML."""
+    
+    @staticmethod
+    def format_weekly_email_html(report: WeeklyReport) -> str:
+        """Genera HTML para email semanal."""
+        
+        # Emoji para tendencia
+        tendencia, color_tendencia = _tendencia_style(
+            report.comparacion.diferencia, report.comparacion.porcentaje
+        )
+        
+        ctx = {
+            'report': report,
+            'tendencia': tendencia,
+            'color_tendencia': color_tendencia,
+        }
+        
+        partes = [_WEEKLY_TPL.format_map(ctx)]
+        partes.extend(
+            _WEEKLY_PRODUCT_TPL.format(i=i, prod=prod)
+            for i, prod in enumerate(report.top_productos, 1)
+        )
+        partes.append(_WEEKLY_FOOTER)
+        
+        return "".join(partes)
+    
+    @staticmethod
+    def format_monthly_email_html(report: MonthlyReport) -> str:
+        """Genera HTML para email mensual."""
+        
+        # Emoji para tendencia
+        tendencia, color_tendencia = _tendencia_style(
+            report.comparacion.diferencia, report.comparacion.porcentaje
+        )
+        
+        ctx = {
+            'report': report,
+            'tendencia': tendencia,
+            'color_tendencia': color_tendencia,
+            'num_productos': len(report.top_productos),
+        }
+        
+        partes = [_MONTHLY_TPL.format_map(ctx)]
+        partes.extend(
+            _MONTHLY_PRODUCT_TPL.format(i=i, prod=prod)
+            for i, prod in enumerate(report.top_productos, 1)
+        )
+        partes.append(_MONTHLY_DAYS_HEADER)
+        
+        for dia in _DIAS_ORDEN:
+            datos = report.gastos_por_dia.get(dia)
+            if datos is not None:
+                partes.append(_MONTHLY_DAY_TPL.format(dia=dia, datos=datos))
+            else:
+                partes.append(_MONTHLY_EMPTY_DAY_TPL.format(dia=dia))
+        
+        partes.append(_MONTHLY_FOOTER)
         
-        return html
\ No newline at end of file
+        return "".join(partes)
\ No newline at end of file
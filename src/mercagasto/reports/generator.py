@@ -3,8 +3,9 @@ Generador de reportes de gastos.
 """
 
 import calendar
-from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
 
 from ..models import WeeklyReport, MonthlyReport, ProductStats, ComparisonStats, DayStats
 from ..storage import TicketStorageBase
@@ -12,6 +13,55 @@ from ..config import get_logger
 
 logger = get_logger(__name__)
 
+# Nombres de los días indexados por EXTRACT(DOW ...) (0 = domingo)
+_DIAS_NOMBRES: Tuple[str, ...] = ('Dom', 'Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb')
+
+# Consultas de agregación de los reportes (se ejecutan como sentencias preparadas)
+_TOP_PRODUCTOS_SQL = """
+    SELECT 
+        p.descripcion,
+        SUM(p.cantidad) as cantidad_total,
+        COUNT(DISTINCT t.id) as veces_comprado,
+        ROUND(AVG(p.precio_total), 2)::float8 as precio_promedio,
+        ROUND(SUM(p.precio_total), 2)::float8 as gasto_total
+    FROM productos p
+    JOIN tickets t ON p.ticket_id = t.id
+    WHERE t.fecha_compra BETWEEN %s AND %s
+    GROUP BY p.descripcion
+    ORDER BY gasto_total DESC
+    LIMIT %s
+"""
+
+_GASTOS_POR_DIA_SQL = """
+    SELECT 
+        EXTRACT(DOW FROM fecha_compra) as dia_semana,
+        COUNT(*) as num_compras,
+        ROUND(SUM(total), 2) as total_gastado
+    FROM tickets
+    WHERE fecha_compra BETWEEN %s AND %s
+    GROUP BY EXTRACT(DOW FROM fecha_compra)
+    ORDER BY dia_semana
+"""
+
+
+@lru_cache(maxsize=64)
+def month_bounds(year: int, month: int) -> Tuple[date, date, date, date]:
+    """
+    Calcula los límites de un mes y del mes anterior.
+    
+    Args:
+        year: Año
+        month: Mes (1-12)
+        
+    Returns:
+        (inicio_mes, fin_mes, inicio_mes_anterior, fin_mes_anterior)
+    """
+    inicio_mes = date(year, month, 1)
+    fin_mes = date(year, month, calendar.monthrange(year, month)[1])
+    fin_mes_anterior = inicio_mes - timedelta(days=1)
+    inicio_mes_anterior = fin_mes_anterior.replace(day=1)
+    return inicio_mes, fin_mes, inicio_mes_anterior, fin_mes_anterior
+
 
 class ReportGenerator:
     """Generador de reportes de gastos."""
@@ -29,29 +79,22 @@ class ReportGenerator:
         """Genera reporte semanal de gastos."""
         logger.info("Generando reporte semanal...")
         
-        hoy = datetime.now()
+        hoy = date.today()
         hace_7_dias = hoy - timedelta(days=7)
         
         # Obtener datos de la semana actual
-        total_semana = self.storage.get_total_gastado(
-            hace_7_dias.strftime('%Y-%m-%d'),
-            hoy.strftime('%Y-%m-%d')
-        )
+        total_semana = self.storage.get_total_gastado(hace_7_dias, hoy)
         
-        tickets_semana = self.storage.get_tickets_by_date_range(
-            hace_7_dias.strftime('%Y-%m-%d'),
-            hoy.strftime('%Y-%m-%d')
-        )
+        tickets_semana = self.storage.get_tickets_by_date_range(hace_7_dias, hoy)
         
-        # Top productos de la semana
-        top_productos = self._get_top_productos_periodo(hace_7_dias.date(), hoy.date(), limit=5)
+        # Top productos de la semana (sin tickets no hay nada que agregar)
+        top_productos = []
+        if tickets_semana:
+            top_productos = self._get_top_productos_periodo(hace_7_dias, hoy, limit=5)
         
         # Comparar con semana anterior
         hace_14_dias = hoy - timedelta(days=14)
-        total_semana_anterior = self.storage.get_total_gastado(
-            hace_14_dias.strftime('%Y-%m-%d'),
-            hace_7_dias.strftime('%Y-%m-%d')
-        )
+        total_semana_anterior = self.storage.get_total_gastado(hace_14_dias, hace_7_dias)
         
         comparacion = self._calculate_comparison(
             total_semana_anterior, total_semana, "semana anterior"
@@ -70,43 +113,23 @@ class ReportGenerator:
         """Genera reporte mensual de gastos."""
         logger.info("Generando reporte mensual...")
         
-        hoy = datetime.now()
-        inicio_mes = hoy.replace(day=1)
-        
-        # Último día del mes
-        ultimo_dia = calendar.monthrange(hoy.year, hoy.month)[1]
-        fin_mes = hoy.replace(day=ultimo_dia)
+        hoy = date.today()
+        inicio_mes, fin_mes, mes_anterior, fin_mes_anterior = month_bounds(hoy.year, hoy.month)
         
         # Obtener datos del mes actual
-        total_mes = self.storage.get_total_gastado(
-            inicio_mes.strftime('%Y-%m-%d'),
-            fin_mes.strftime('%Y-%m-%d')
-        )
-        
-        tickets_mes = self.storage.get_tickets_by_date_range(
-            inicio_mes.strftime('%Y-%m-%d'),
-            fin_mes.strftime('%Y-%m-%d')
-        )
+        total_mes = self.storage.get_total_gastado(inicio_mes, fin_mes)
         
-        # Top productos del mes
-        top_productos = self._get_top_productos_periodo(inicio_mes.date(), fin_mes.date(), limit=10)
+        tickets_mes = self.storage.get_tickets_by_date_range(inicio_mes, fin_mes)
         
-        # Gastos por día de la semana
-        gastos_por_dia = self._get_gastos_por_dia_semana(inicio_mes.date(), fin_mes.date())
+        # Top productos y gastos por día de la semana (sin tickets no hay nada que agregar)
+        top_productos = []
+        gastos_por_dia = {}
+        if tickets_mes:
+            top_productos = self._get_top_productos_periodo(inicio_mes, fin_mes, limit=10)
+            gastos_por_dia = self._get_gastos_por_dia_semana(inicio_mes, fin_mes)
         
         # Comparar con mes anterior
-        if hoy.month == 1:
-            mes_anterior = hoy.replace(year=hoy.year-1, month=12, day=1)
-        else:
-            mes_anterior = hoy.replace(month=hoy.month-1, day=1)
-        
-        ultimo_dia_anterior = calendar.monthrange(mes_anterior.year, mes_anterior.month)[1]
-        fin_mes_anterior = mes_anterior.replace(day=ultimo_dia_anterior)
-        
-        total_mes_anterior = self.storage.get_total_gastado(
-            mes_anterior.strftime('%Y-%m-%d'),
-            fin_mes_anterior.strftime('%Y-%m-%d')
-        )
+        total_mes_anterior = self.storage.get_total_gastado(mes_anterior, fin_mes_anterior)
         
         comparacion = self._calculate_comparison(
             total_mes_anterior, total_mes, mes_anterior.strftime('%B')
@@ -123,6 +146,13 @@ class ReportGenerator:
             comparacion=comparacion
         )
     
+    def _execute(self, cursor, name: str, query: str, params: tuple) -> None:
+        """Ejecuta una consulta preparada si el storage lo soporta."""
+        if hasattr(self.storage, 'execute_prepared'):
+            self.storage.execute_prepared(cursor, name, query, params)
+        else:
+            cursor.execute(query, params)
+    
     def _get_top_productos_periodo(self, fecha_inicio, fecha_fin, limit: int = 10) -> List[ProductStats]:
         """Obtiene top productos para un período específico."""
         # Esta implementación requiere acceso directo a la BD
@@ -131,31 +161,11 @@ class ReportGenerator:
             if hasattr(self.storage, 'get_connection'):
                 with self.storage.get_connection() as conn:
                     cursor = conn.cursor()
-                    cursor.execute("""
-                        SELECT 
-                            p.descripcion,
-                            SUM(p.cantidad) as cantidad_total,
-                            COUNT(DISTINCT t.id) as veces_comprado,
-                            ROUND(AVG(p.precio_total), 2) as precio_promedio,
-                            ROUND(SUM(p.precio_total), 2) as gasto_total
-                        FROM productos p
-                        JOIN tickets t ON p.ticket_id = t.id
-                        WHERE t.fecha_compra BETWEEN %s AND %s
-                        GROUP BY p.descripcion
-                        ORDER BY gasto_total DESC
-                        LIMIT %s
-                    """, (fecha_inicio, fecha_fin, limit))
+                    self._execute(cursor, 'top_productos_periodo', _TOP_PRODUCTOS_SQL,
+                                  (fecha_inicio, fecha_fin, limit))
                     
-                    return [
-                        ProductStats(
-                            descripcion=row[0],
-                            cantidad_total=row[1],
-                            veces_comprado=row[2],
-                            precio_promedio=float(row[3]),
-                            gasto_total=float(row[4])
-                        )
-                        for row in cursor.fetchall()
-                    ]
+                    # Las columnas siguen el orden de los campos de ProductStats
+                    return [ProductStats(*row) for row in cursor]
         except Exception as e:
             logger.warning(f"Error obteniendo top productos: {e}")
         
@@ -167,25 +177,16 @@ class ReportGenerator:
             if hasattr(self.storage, 'get_connection'):
                 with self.storage.get_connection() as conn:
                     cursor = conn.cursor()
-                    cursor.execute("""
-                        SELECT 
-                            EXTRACT(DOW FROM fecha_compra) as dia_semana,
-                            COUNT(*) as num_compras,
-                            ROUND(SUM(total), 2) as total_gastado
-                        FROM tickets
-                        WHERE fecha_compra BETWEEN %s AND %s
-                        GROUP BY EXTRACT(DOW FROM fecha_compra)
-                        ORDER BY dia_semana
-                    """, (fecha_inicio, fecha_fin))
+                    self._execute(cursor, 'gastos_por_dia_semana', _GASTOS_POR_DIA_SQL,
+                                  (fecha_inicio, fecha_fin))
                     
-                    dias_nombres = ['Dom', 'Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb']
                     gastos_por_dia = {}
                     
                     for row in cursor.fetchall():
-                        dia_num = int(row[0])
-                        gastos_por_dia[dias_nombres[dia_num]] = DayStats(
-                            dia=dias_nombres[dia_num],
-                            total_gastado=float(row[2]),
+                        dia = _DIAS_NOMBRES[int(row[0])]
+                        gastos_por_dia[dia] = DayStats(
+                            dia=dia,
+                            total_gastado=row[2],
                             num_compras=row[1]
                         )
                     
@@ -3,7 +3,8 @@ Clase base para almacenamiento de tickets.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Optional, Dict, Any
+from datetime import date
+from typing import List, Tuple, Optional, Dict, Any, Union
 from contextlib import contextmanager
 
 from ..models import TicketData
@@ -57,13 +58,14 @@ class TicketStorageBase(ABC):
         pass
     
     @abstractmethod
-    def get_tickets_by_date_range(self, fecha_inicio: str, fecha_fin: str) -> List[Dict[str, Any]]:
+    def get_tickets_by_date_range(self, fecha_inicio: Union[str, date],
+                                  fecha_fin: Union[str, date]) -> List[Dict[str, Any]]:
         """
         Obtiene tickets en un rango de fechas.
         
         Args:
-            fecha_inicio: Fecha de inicio (YYYY-MM-DD)
-            fecha_fin: Fecha de fin (YYYY-MM-DD)
+            fecha_inicio: Fecha de inicio (date o YYYY-MM-DD)
+            fecha_fin: Fecha de fin (date o YYYY-MM-DD)
             
         Returns:
             Lista de tickets
@@ -71,7 +73,8 @@ class TicketStorageBase(ABC):
         pass
     
     @abstractmethod
-    def get_total_gastado(self, fecha_inicio: str = None, fecha_fin: str = None) -> float:
+    def get_total_gastado(self, fecha_inicio: Union[str, date] = None,
+                          fecha_fin: Union[str, date] = None) -> float:
         """
         Calcula el total gastado en un período.
         
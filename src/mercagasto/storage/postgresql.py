@@ -3,11 +3,16 @@ Almacenamiento en PostgreSQL para tickets.
 """
 
 import psycopg2
-from psycopg2.extras import execute_values
+import psycopg2.extensions
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from contextlib import contextmanager
-from datetime import datetime
-from typing import List, Tuple, Optional, Dict, Any, Union
-import traceback
+from datetime import date, datetime, time
+import io
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Tuple, Optional, Dict, Any, Union
+import threading
+from uuid import uuid4
 
 from .base import TicketStorageBase
 from ..models import TicketData, ProcessingStatus, Product
@@ -15,47 +20,283 @@ from ..config import get_logger, DatabaseConfig
 
 logger = get_logger(__name__)
 
+# Por debajo de este número de filas un INSERT multi-fila es más barato que COPY
+_COPY_MIN_ROWS = 5
+
+# Límite de filas por sentencia en execute_values (acota el tamaño del SQL)
+_MAX_PAGE_SIZE = 1000
+
+# Escapes del formato texto de COPY
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+# Entradas máximas de las cachés de tiendas y subscriptores (LRU)
+_CACHE_MAX_SIZE = 1024
+
+_PRODUCT_COPY_COLUMNS = "ticket_id, cantidad, descripcion, precio_unitario, precio_total, peso"
+
+
+# Sentencias de las rutas calientes (se ejecutan como sentencias preparadas)
+_SQL_IS_SUBSCRIBED = """
+    SELECT 1 FROM subscribed_emails WHERE LOWER(email) = LOWER(%s) LIMIT 1
+"""
+
+# Subscriptor existente o recién creado (con un flag que indica si se ha creado)
+_SQL_SUBSCRIPTOR = """
+    WITH existente AS (
+        SELECT id FROM subscribed_emails WHERE LOWER(email) = LOWER(%s) LIMIT 1
+    ),
+    nuevo AS (
+        INSERT INTO subscribed_emails (email)
+        SELECT %s WHERE NOT EXISTS (SELECT 1 FROM existente)
+        ON CONFLICT (email) DO UPDATE SET email = EXCLUDED.email
+        RETURNING id
+    )
+    SELECT id, FALSE FROM existente
+    UNION ALL
+    SELECT id, TRUE FROM nuevo
+    LIMIT 1
+"""
+
+_SQL_START_PROC = """
+    INSERT INTO processing_log (
+        gmail_message_id, subscriptor_id, pdf_filename, pdf_hash, status, 
+        attempts, last_attempt, pdf_path
+    )
+    VALUES (%s, %s, %s, %s, %s, 1, NOW(), %s)
+    ON CONFLICT (gmail_message_id) DO UPDATE SET
+        attempts = processing_log.attempts + 1,
+        last_attempt = NOW(),
+        status = EXCLUDED.status
+    RETURNING id, (xmax = 0) AS nuevo
+"""
+
+_SQL_UPDATE_PROC = """
+    UPDATE processing_log
+    SET status = %s,
+        error_stage = %s,
+        error_message = %s,
+        error_traceback = %s,
+        ticket_id = %s,
+        extracted_text_path = %s,
+        completed_at = %s
+    WHERE id = %s
+"""
+
+_SQL_INSERT_BACKUP = """
+    INSERT INTO file_backups (
+        processing_log_id, file_type, file_path, 
+        file_hash, file_size
+    )
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+_SQL_GET_TICKET = """
+    SELECT 
+        t.id, t.numero_pedido, t.numero_factura,
+        t.fecha_compra, t.hora_compra, t.total, t.metodo_pago,
+        ti.nombre, ti.cif, ti.direccion, ti.ciudad,
+        COALESCE((
+            SELECT json_agg(json_build_object(
+                'cantidad', p.cantidad,
+                'descripcion', p.descripcion,
+                'precio_unitario', p.precio_unitario,
+                'precio_total', p.precio_total,
+                'peso', p.peso
+            ) ORDER BY p.id)
+            FROM productos p
+            WHERE p.ticket_id = t.id
+        ), '[]'::json) AS productos
+    FROM tickets t
+    JOIN tiendas ti ON t.tienda_id = ti.id
+    WHERE t.id = %s
+"""
+
+# Upsert de tiendas + inserción de tickets en un único round-trip.
+# Las tiendas con tienda_id (ya conocidas en caché) no se vuelven a escribir y
+# las existentes no se actualizan (todas las de Mercadona comparten CIF, así que
+# actualizar alternaría la dirección entre tiendas en cada ticket); no salen en
+# el RETURNING de "s" y su id se toma de la tabla.
+# Devuelve (numero_factura, id, duplicado, cif, tienda_id) en el orden de
+# entrada; los tickets que ya existían se leen de la tabla, que no ve las filas
+# insertadas en "t".
+_SAVE_TICKETS_SQL = """
+    WITH datos (
+        orden, tienda_id, nombre, cif, direccion, codigo_postal, ciudad, telefono,
+        subscriptor_id, numero_pedido, numero_factura, fecha_compra,
+        hora_compra, total, metodo_pago,
+        iva_4_base, iva_4_cuota, iva_10_base, iva_10_cuota,
+        iva_21_base, iva_21_cuota
+    ) AS (
+        VALUES %s
+    ),
+    s AS (
+        INSERT INTO tiendas (nombre, cif, direccion, codigo_postal, ciudad, telefono)
+        SELECT DISTINCT ON (cif) nombre, cif, direccion, codigo_postal, ciudad, telefono
+        FROM datos
+        WHERE tienda_id IS NULL
+        ORDER BY cif, orden DESC
+        ON CONFLICT (cif) DO NOTHING
+        RETURNING id, cif
+    ),
+    t AS (
+        INSERT INTO tickets (
+            tienda_id, subscriptor_id, numero_pedido, numero_factura, fecha_compra,
+            hora_compra, total, metodo_pago,
+            iva_4_base, iva_4_cuota,
+            iva_10_base, iva_10_cuota,
+            iva_21_base, iva_21_cuota
+        )
+        SELECT
+            COALESCE(d.tienda_id, s.id, ti.id), d.subscriptor_id, d.numero_pedido, d.numero_factura, d.fecha_compra,
+            d.hora_compra, d.total, d.metodo_pago,
+            d.iva_4_base, d.iva_4_cuota,
+            d.iva_10_base, d.iva_10_cuota,
+            d.iva_21_base, d.iva_21_cuota
+        FROM datos d
+        LEFT JOIN s ON s.cif = d.cif
+        LEFT JOIN tiendas ti ON ti.cif = d.cif
+        ORDER BY d.orden
+        ON CONFLICT (numero_factura) DO NOTHING
+        RETURNING numero_factura, id
+    )
+    SELECT d.numero_factura, COALESCE(t.id, e.id), t.id IS NULL,
+           d.cif, COALESCE(d.tienda_id, s.id, ti.id)
+    FROM datos d
+    LEFT JOIN s ON s.cif = d.cif
+    LEFT JOIN tiendas ti ON ti.cif = d.cif
+    LEFT JOIN t ON t.numero_factura = d.numero_factura
+    LEFT JOIN tickets e ON e.numero_factura = d.numero_factura
+    ORDER BY d.orden
+"""
+
+# Tipos explícitos: los literales de VALUES llegan sin tipo (o NULL)
+_SAVE_TICKETS_TEMPLATE = (
+    "(%s::int, %s::int, %s, %s, %s, %s, %s, %s, %s::int, %s, %s, %s::date, %s::time,"
+    " %s::numeric, %s, %s::numeric, %s::numeric, %s::numeric, %s::numeric,"
+    " %s::numeric, %s::numeric)"
+)
+
+
+def _page_size(num_rows: int) -> int:
+    """Tamaño de página para que execute_values use un único round-trip."""
+    return min(max(100, num_rows), _MAX_PAGE_SIZE)
+
+
+# NUMERIC -> float en la capa C de psycopg2 (se registra por conexión del pool)
+DEC2FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    'DEC2FLOAT',
+    lambda value, cursor: float(value) if value is not None else None
+)
+
+
+def _as_date(value: Any) -> Any:
+    """Convierte una fecha (datetime o 'YYYY-MM-DD') a date una sola vez en Python."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str) and value:
+        return date.fromisoformat(value)
+    return value
+
+
+def _as_time(value: Any) -> Any:
+    """Convierte una hora 'HH:MM[:SS]' a time una sola vez en Python."""
+    if isinstance(value, str) and value:
+        return time.fromisoformat(value)
+    return value
+
+
+def _copy_value(value: Any) -> str:
+    """Serializa un valor para COPY ... FROM STDIN en formato texto."""
+    if value is None:
+        return '\\N'
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def _lru_get(cache: 'OrderedDict[str, int]', clave: str) -> Optional[int]:
+    """Lee de una caché LRU marcando la entrada como usada recientemente."""
+    valor = cache.get(clave)
+    if valor is not None:
+        cache.move_to_end(clave)
+    return valor
+
+
+def _lru_update(cache: 'OrderedDict[str, int]', valores: Dict[str, int]) -> None:
+    """Añade entradas a una caché LRU descartando las más antiguas si se llena."""
+    for clave, valor in valores.items():
+        cache[clave] = valor
+        cache.move_to_end(clave)
+    while len(cache) > _CACHE_MAX_SIZE:
+        cache.popitem(last=False)
+
+
+def _copy_rows(cursor, table: str, columns: str, rows: Iterable[Tuple]) -> int:
+    """
+    Carga filas en una tabla con COPY ... FROM STDIN (formato texto).
+    
+    Returns:
+        Número de filas enviadas
+    """
+    buffer = io.StringIO()
+    num_rows = 0
+    for row in rows:
+        buffer.write('\t'.join(map(_copy_value, row)) + '\n')
+        num_rows += 1
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT text)", buffer)
+    return num_rows
+
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """
+    Conexión que recuerda las sentencias preparadas en su sesión.
+    
+    Además devuelve los NUMERIC como float, evitando convertir Decimal
+    celda a celda en las lecturas.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+        psycopg2.extensions.register_type(DEC2FLOAT, self)
+
 
 class PostgreSQLTicketStorage(TicketStorageBase):
     """Implementación de almacenamiento en PostgreSQL."""
 
     def is_email_subscribed(self, email: str) -> bool:
         """Comprueba si un email está subscrito (tabla 'subscribed_emails')."""
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 1 FROM subscribed_emails WHERE LOWER(email) = LOWER(%s) LIMIT 1
-            """, (email,))
+            self.execute_prepared(cursor, 'is_email_subscribed', _SQL_IS_SUBSCRIBED, (email,))
             return cursor.fetchone() is not None
     
     def get_or_create_subscriptor_id(self, email: str) -> int:
         """Obtiene el ID del subscriptor o lo crea si no existe."""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Intentar obtener ID existente
-            cursor.execute("""
-                SELECT id FROM subscribed_emails WHERE LOWER(email) = LOWER(%s)
-            """, (email,))
-            
-            result = cursor.fetchone()
-            if result:
-                return result[0]
-            
-            # Si no existe, crearlo
-            cursor.execute("""
-                INSERT INTO subscribed_emails (email) VALUES (%s)
-                ON CONFLICT (email) DO UPDATE SET email = EXCLUDED.email
-                RETURNING id
-            """, (email,))
-            
-            result = cursor.fetchone()
-            if result is None:
-                raise ValueError(f"No se pudo crear o obtener subscriptor para {email}")
-            
-            subscriptor_id = result[0]
-            logger.info(f"Subscriptor ID obtenido/creado: {subscriptor_id} para {email}")
+            return self._get_or_create_subscriptor_id(conn.cursor(), email)
+    
+    def _get_or_create_subscriptor_id(self, cursor, email: str) -> int:
+        """Igual que get_or_create_subscriptor_id pero dentro de la transacción del cursor."""
+        clave = email.lower()
+        subscriptor_id = _lru_get(self._subscriptor_cache, clave)
+        if subscriptor_id is not None:
             return subscriptor_id
+        
+        # Obtener el ID existente o crearlo en un único round-trip
+        self.execute_prepared(cursor, 'get_or_create_subscriptor', _SQL_SUBSCRIPTOR, (email, email))
+        
+        result = cursor.fetchone()
+        if result is None:
+            raise ValueError(f"No se pudo crear o obtener subscriptor para {email}")
+        
+        subscriptor_id, creado = result
+        if creado:
+            logger.info(f"Subscriptor ID obtenido/creado: {subscriptor_id} para {email}")
+        else:
+            # Sólo se cachean los ya confirmados: uno recién creado podría revertirse
+            self._cache_after_commit(self._subscriptor_cache, {clave: subscriptor_id})
+        return subscriptor_id
 
     def __init__(self, config: DatabaseConfig, debug_queries: bool = False):
         """
@@ -65,34 +306,149 @@ class PostgreSQLTicketStorage(TicketStorageBase):
             config: Configuración de la base de datos
             debug_queries: Si True, logea todas las consultas SQL
         """
-        self.connection_params = {
-            'host': config.host,
-            'port': config.port,
-            'database': config.database,
-            'user': config.user,
-            'password': config.password,
-            'sslmode': config.sslmode,
-            'connect_timeout': config.connect_timeout,
-            'application_name': config.application_name
-        }
+        self.connection_params = config.connection_params()
+        self.pool_min_size = config.pool_min_size
+        self.pool_max_size = config.pool_max_size
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        # Conexión de la transacción abierta por batch() en cada hilo
+        self._local = threading.local()
+        # cif -> tiendas.id de tiendas ya guardadas (los ids no cambian)
+        self._store_cache: 'OrderedDict[str, int]' = OrderedDict()
+        # email en minúsculas -> subscribed_emails.id
+        self._subscriptor_cache: 'OrderedDict[str, int]' = OrderedDict()
         self.debug_queries = debug_queries
         logger.info(f"Configurado almacenamiento PostgreSQL: {config.host}:{config.port}/{config.database} (SSL: {config.sslmode})")
         if debug_queries:
             logger.info("🔍 DEBUG de consultas SQL activado")
     
+    def _get_pool(self) -> ThreadedConnectionPool:
+        """Crea el pool de conexiones en el primer uso y lo reutiliza después."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(
+                        self.pool_min_size, self.pool_max_size,
+                        connection_factory=PreparingConnection,
+                        **self.connection_params
+                    )
+                    logger.debug(f"Pool de conexiones creado ({self.pool_min_size}-{self.pool_max_size})")
+        return self._pool
+    
     @contextmanager
-    def get_connection(self):
-        """Context manager para conexiones a la BD."""
-        conn = psycopg2.connect(**self.connection_params)
+    def get_connection(self, readonly: bool = False):
+        """
+        Context manager para conexiones a la BD.
+        
+        Las conexiones se toman del pool y se devuelven al terminar, evitando
+        el coste de conexión (TCP, SSL y autenticación) en cada operación.
+        
+        Args:
+            readonly: Si True, la conexión se usa en autocommit para consultas
+                de sólo lectura, sin el BEGIN/COMMIT de una transacción
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            # Dentro de batch(): se reutiliza su transacción, que confirma al salir
+            yield conn
+            return
+        
+        pool = self._get_pool()
+        conn = pool.getconn()
+        if conn.closed:
+            # Conexión caída mientras estaba en el pool: descartarla y pedir otra
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        if readonly:
+            conn.autocommit = True
         try:
             yield conn
-            conn.commit()
+            if not readonly:
+                conn.commit()
         except Exception as e:
-            conn.rollback()
-            logger.error(f"Error en transacción de BD: {e}")
-            raise e
+            if not conn.closed and not readonly:
+                conn.rollback()
+            logger.error("Error en transacción de BD: %s", e)
+            raise
         finally:
-            conn.close()
+            if readonly and not conn.closed:
+                conn.autocommit = False
+            pool.putconn(conn, close=bool(conn.closed))
+    
+    @staticmethod
+    def _dict_cursor(conn):
+        """Cursor que devuelve cada fila directamente como diccionario."""
+        return conn.cursor(cursor_factory=RealDictCursor)
+    
+    @contextmanager
+    def batch(self):
+        """
+        Agrupa varias operaciones en una única transacción.
+        
+        Las llamadas hechas dentro del bloque (en el mismo hilo) comparten
+        conexión y se confirman con un solo COMMIT al salir; si hay una
+        excepción se revierte todo el lote.
+        
+        Example:
+            with storage.batch():
+                for ticket in tickets:
+                    storage.save_ticket(ticket)
+        """
+        if getattr(self._local, 'conn', None) is not None:
+            # Lote anidado: forma parte del exterior
+            yield self._local.conn
+            return
+        
+        pendientes: List[Tuple[Dict, Dict]] = []
+        with self.get_connection() as conn:
+            self._local.conn = conn
+            self._local.pendientes = pendientes
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+                self._local.pendientes = None
+        
+        # El lote se ha confirmado: ya se pueden cachear sus ids
+        for cache, valores in pendientes:
+            _lru_update(cache, valores)
+    
+    def _cache_after_commit(self, cache: Dict, valores: Dict) -> None:
+        """Guarda valores en una caché, esperando al commit si hay un batch() abierto."""
+        pendientes = getattr(self._local, 'pendientes', None)
+        if pendientes is None:
+            _lru_update(cache, valores)
+        else:
+            pendientes.append((cache, valores))
+    
+    def execute_prepared(self, cursor, name: str, query: str, params: Tuple = ()) -> None:
+        """
+        Ejecuta una consulta como sentencia preparada de PostgreSQL.
+        
+        La primera vez en cada conexión se hace PREPARE y las siguientes
+        ejecuciones sólo EXECUTE, ahorrando el análisis y la planificación.
+        
+        Args:
+            cursor: Cursor de una conexión del pool
+            name: Nombre de la sentencia (único por consulta)
+            query: SQL con marcadores %s
+            params: Parámetros de la consulta
+        """
+        prepared = getattr(cursor.connection, 'prepared_statements', None)
+        if prepared is None:
+            # Conexión ajena al pool: ejecución normal
+            cursor.execute(query, params)
+            return
+        
+        if name not in prepared:
+            placeholders = tuple(f"${i}" for i in range(1, len(params) + 1))
+            cursor.execute(f"PREPARE {name} AS {query % placeholders}")
+            prepared.add(name)
+        
+        if params:
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cursor.execute(f"EXECUTE {name}")
     
     def create_tables(self) -> None:
         """Crea las tablas necesarias en PostgreSQL."""
@@ -123,6 +479,10 @@ class PostgreSQLTicketStorage(TicketStorageBase):
             """)
             
             # Tabla de tickets
+            # No se particiona por fecha_compra: en una tabla particionada
+            # UNIQUE(numero_factura) (usado por ON CONFLICT) y las FK a tickets(id)
+            # tendrían que incluir la clave de partición. El filtrado por rango de
+            # fechas lo cubren los índices BRIN / idx_tickets_fecha_covering.
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS tickets (
                     id SERIAL PRIMARY KEY,
@@ -159,6 +519,8 @@ class PostgreSQLTicketStorage(TicketStorageBase):
             """)
             
             # Tabla de tracking de procesamiento
+            # Tampoco se particiona: UNIQUE(gmail_message_id) y la FK de file_backups
+            # a processing_log(id) lo impiden sin incluir created_at en la clave.
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS processing_log (
                     id SERIAL PRIMARY KEY,
@@ -201,13 +563,25 @@ class PostgreSQLTicketStorage(TicketStorageBase):
     def _create_indexes(self, cursor) -> None:
         """Crea índices para mejorar el rendimiento."""
         indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_tickets_fecha ON tickets(fecha_compra)",
+            # Columnas de fecha que crecen con la inserción: BRIN ocupa una fracción del B-tree
+            "DROP INDEX IF EXISTS idx_tickets_fecha",
+            "CREATE INDEX IF NOT EXISTS idx_tickets_fecha_brin ON tickets USING BRIN (fecha_compra) WITH (pages_per_range = 32)",
+            "CREATE INDEX IF NOT EXISTS idx_processing_created_brin ON processing_log USING BRIN (created_at) WITH (pages_per_range = 32)",
+            "CREATE INDEX IF NOT EXISTS idx_file_backups_created_brin ON file_backups USING BRIN (created_at) WITH (pages_per_range = 32)",
             "CREATE INDEX IF NOT EXISTS idx_productos_ticket ON productos(ticket_id)",
             "CREATE INDEX IF NOT EXISTS idx_productos_descripcion ON productos(descripcion)",
             "CREATE INDEX IF NOT EXISTS idx_processing_status ON processing_log(status)",
             "CREATE INDEX IF NOT EXISTS idx_processing_message_id ON processing_log(gmail_message_id)",
             "CREATE INDEX IF NOT EXISTS idx_tickets_subscriptor ON tickets(subscriptor_id)",
             "CREATE INDEX IF NOT EXISTS idx_processing_subscriptor ON processing_log(subscriptor_id)",
+            # get_total_gastado (SUM(total)) y get_tickets_by_date_range (id, numero_factura,
+            # total) por rango de fechas con index-only scan; sustituye a idx_tickets_fecha_total
+            "DROP INDEX IF EXISTS idx_tickets_fecha_total",
+            "CREATE INDEX IF NOT EXISTS idx_tickets_fecha_covering ON tickets(fecha_compra) INCLUDE (id, numero_factura, total)",
+            # get_failed_processings: parcial sobre los fallidos y cubriendo las columnas devueltas
+            """CREATE INDEX IF NOT EXISTS idx_proc_failed ON processing_log(last_attempt DESC)
+               INCLUDE (id, gmail_message_id, pdf_filename, pdf_path, attempts, error_message)
+               WHERE status IN ('failed', 'retry')""",
         ]
         
         for index in indexes:
@@ -232,27 +606,23 @@ class PostgreSQLTicketStorage(TicketStorageBase):
             cursor = conn.cursor()
             
             # Obtener o crear subscriptor_id
-            subscriptor_id = self.get_or_create_subscriptor_id(subscriptor_email)
+            subscriptor_id = self._get_or_create_subscriptor_id(cursor, subscriptor_email)
             
-            cursor.execute("""
-                INSERT INTO processing_log (
-                    gmail_message_id, subscriptor_id, pdf_filename, pdf_hash, status, 
-                    attempts, last_attempt, pdf_path
-                )
-                VALUES (%s, %s, %s, %s, %s, 1, NOW(), %s)
-                ON CONFLICT (gmail_message_id) DO UPDATE SET
-                    attempts = processing_log.attempts + 1,
-                    last_attempt = NOW(),
-                    status = EXCLUDED.status
-                RETURNING id
-            """, (message_id, subscriptor_id, pdf_filename, pdf_hash, 
-                  ProcessingStatus.PENDING.value, pdf_path))
+            self.execute_prepared(cursor, 'start_processing', _SQL_START_PROC, (
+                message_id, subscriptor_id, pdf_filename, pdf_hash,
+                ProcessingStatus.PENDING.value, pdf_path
+            ))
             
             result = cursor.fetchone()
-            processing_id = result[0] if result else None
-            if processing_id is None:
+            if result is None:
                 raise ValueError("No se pudo obtener el ID del procesamiento")
-            logger.info(f"Iniciado procesamiento ID: {processing_id} para mensaje {message_id}")
+            
+            # xmax = 0 sólo en filas recién insertadas; si no, el upsert ha sumado un intento
+            processing_id, nuevo = result
+            if nuevo:
+                logger.info("Iniciado procesamiento ID: %s para mensaje %s", processing_id, message_id)
+            else:
+                logger.info("Reintento del procesamiento ID: %s para mensaje %s", processing_id, message_id)
             return processing_id
     
     def update_processing_status(self, processing_id: int, status: ProcessingStatus,
@@ -265,28 +635,54 @@ class PostgreSQLTicketStorage(TicketStorageBase):
             
             completed_at = datetime.now() if status == ProcessingStatus.COMPLETED else None
             
+            self.execute_prepared(cursor, 'update_processing_status', _SQL_UPDATE_PROC, (
+                status.value, error_stage, error_message, error_traceback,
+                ticket_id, extracted_text_path, completed_at, processing_id
+            ))
+            
+            logger.debug("Actualizado procesamiento %s a estado: %s", processing_id, status.value)
+    
+    def bulk_update_processing_status(self, updates: List[Tuple[int, ProcessingStatus, Optional[int]]]) -> None:
+        """
+        Actualiza el estado de varios procesamientos en una sola sentencia.
+        
+        Args:
+            updates: Tuplas (processing_id, status, ticket_id)
+        """
+        if not updates:
+            return
+        
+        ahora = datetime.now()
+        ids, estados, completados, ticket_ids = [], [], [], []
+        for processing_id, status, ticket_id in updates:
+            ids.append(processing_id)
+            estados.append(status.value)
+            completados.append(ahora if status == ProcessingStatus.COMPLETED else None)
+            ticket_ids.append(ticket_id)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
             cursor.execute("""
-                UPDATE processing_log
-                SET status = %s,
-                    error_stage = %s,
-                    error_message = %s,
-                    error_traceback = %s,
-                    ticket_id = %s,
-                    extracted_text_path = %s,
-                    completed_at = %s
-                WHERE id = %s
-            """, (status.value, error_stage, error_message, error_traceback,
-                  ticket_id, extracted_text_path, completed_at, processing_id))
-            
-            logger.debug(f"Actualizado procesamiento {processing_id} a estado: {status.value}")
+                UPDATE processing_log AS pl
+                SET status = v.status,
+                    completed_at = v.completed_at,
+                    ticket_id = v.ticket_id
+                FROM UNNEST(%s::int[], %s::text[], %s::timestamp[], %s::int[])
+                     AS v(id, status, completed_at, ticket_id)
+                WHERE pl.id = v.id
+            """, (ids, estados, completados, ticket_ids))
+            
+            logger.debug("Actualizados %d procesamientos", cursor.rowcount)
     
     def get_failed_processings(self, max_attempts: int = 3) -> List[Dict[str, Any]]:
         """Obtiene procesamiento fallidos para reintentar."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        with self.get_connection(readonly=True) as conn:
+            # Las filas llegan ya como diccionarios con las claves esperadas
+            cursor = self._dict_cursor(conn)
             
             cursor.execute("""
-                SELECT id, gmail_message_id, pdf_filename, pdf_path, 
+                SELECT id, gmail_message_id AS message_id, pdf_filename, pdf_path, 
                        attempts, error_message
                 FROM processing_log
                 WHERE status IN (%s, %s)
@@ -294,19 +690,7 @@ class PostgreSQLTicketStorage(TicketStorageBase):
                 ORDER BY last_attempt DESC
             """, (ProcessingStatus.FAILED.value, ProcessingStatus.RETRY.value, max_attempts))
             
-            # Convertir a diccionario usando nombres de columna
-            columns = [desc[0] for desc in cursor.description]
-            return [
-                {
-                    'id': row[columns.index('id')],
-                    'message_id': row[columns.index('gmail_message_id')],
-                    'pdf_filename': row[columns.index('pdf_filename')],
-                    'pdf_path': row[columns.index('pdf_path')],
-                    'attempts': row[columns.index('attempts')],
-                    'error_message': row[columns.index('error_message')]
-                }
-                for row in cursor.fetchall()
-            ]
+            return cursor.fetchall()
     
     def register_file_backup(self, processing_id: int, file_type: str,
                             file_path: str, file_hash: str, file_size: int) -> None:
@@ -314,25 +698,48 @@ class PostgreSQLTicketStorage(TicketStorageBase):
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute("""
+            self.execute_prepared(cursor, 'register_file_backup', _SQL_INSERT_BACKUP, (
+                processing_id, file_type, file_path, file_hash, file_size
+            ))
+            
+            logger.debug("Registrado backup: %s - %s", file_type, file_path)
+    
+    def register_file_backups(self, processing_id: int,
+                              backups: List[Tuple[str, str, str, int]]) -> None:
+        """
+        Registra varios backups de archivo de un procesamiento en un solo INSERT.
+        
+        Args:
+            processing_id: ID del procesamiento
+            backups: Tuplas (file_type, file_path, file_hash, file_size)
+        """
+        if not backups:
+            return
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            execute_values(cursor, """
                 INSERT INTO file_backups (
                     processing_log_id, file_type, file_path, 
                     file_hash, file_size
                 )
-                VALUES (%s, %s, %s, %s, %s)
-            """, (processing_id, file_type, file_path, file_hash, file_size))
+                VALUES %s
+            """, [(processing_id, *backup) for backup in backups],
+                template="(%s, %s, %s, %s, %s)")
             
-            logger.debug(f"Registrado backup: {file_type} - {file_path}")
+            logger.debug("Registrados %d backups para procesamiento %s", len(backups), processing_id)
     
     def validate_ticket(self, ticket: TicketData) -> Tuple[bool, List[str]]:
         """Valida un ticket antes de guardarlo."""
-        errors = []
+        errors: List[str] = []
         
         # Validaciones básicas
-        if not ticket.total or ticket.total <= 0:
+        total_valido = bool(ticket.total) and ticket.total > 0
+        if not total_valido:
             errors.append("Total inválido o cero")
         
-        if not ticket.products or len(ticket.products) == 0:
+        if not ticket.products:
             errors.append("Sin productos")
         
         if not ticket.date:
@@ -341,92 +748,117 @@ class PostgreSQLTicketStorage(TicketStorageBase):
         if not ticket.invoice_number:
             errors.append("Sin número de factura")
         
-        # Validar que la suma de productos coincida exactamente con el total
-        if not ticket.is_total_consistent:
-            suma_productos = ticket.products_total
-            errors.append(
-                f"Suma de productos ({suma_productos:.2f}€) no coincide con total ({ticket.total:.2f}€)"
-            )
-        
-        # Validar productos individualmente
-        for i, p in enumerate(ticket.products):
-            if not p.description:
-                errors.append(f"Producto {i+1} sin descripción")
-            if p.total_price <= 0:
-                errors.append(f"Producto {i+1} con precio inválido")
-        
-        is_valid = len(errors) == 0
+        if ticket.products:
+            # Un solo recorrido de productos: suma y validación individual
+            suma_productos = 0.0
+            product_errors = []
+            for i, p in enumerate(ticket.products, 1):
+                suma_productos += p.total_price
+                if not p.description:
+                    product_errors.append(f"Producto {i} sin descripción")
+                if p.total_price <= 0:
+                    product_errors.append(f"Producto {i} con precio inválido")
+            
+            # Validar que la suma de productos coincida con el total (tolerancia de 1 céntimo);
+            # con un total inválido la comparación no aporta nada
+            if total_valido and abs(suma_productos - ticket.total) > 0.01:
+                errors.append(
+                    f"Suma de productos ({suma_productos:.2f}€) no coincide con total ({ticket.total:.2f}€)"
+                )
+            errors.extend(product_errors)
         
-        if not is_valid:
-            logger.warning(f"Ticket no válido: {', '.join(errors)}")
+        if not errors:
+            return True, errors
         
-        return is_valid, errors
+        logger.warning(f"Ticket no válido: {', '.join(errors)}")
+        return False, errors
     
     def save_ticket(self, ticket: TicketData, subscriptor_email: str = None) -> int:
         """Guarda un ticket completo en PostgreSQL."""
-        # Validar ticket primero
-        is_valid, errors = self.validate_ticket(ticket)
-        if not is_valid:
-            error_msg = f"Ticket inválido: {'; '.join(errors)}"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
+        return self.save_tickets([ticket], subscriptor_email)[0]
+    
+    def save_tickets(self, tickets: List[TicketData], subscriptor_email: str = None) -> List[int]:
+        """
+        Guarda varios tickets en una única transacción.
+        
+        Tiendas y tickets se insertan en una única sentencia (CTE) y los
+        productos de todos los tickets nuevos juntos.
+        
+        Args:
+            tickets: Tickets a guardar
+            subscriptor_email: Email del subscriptor (opcional)
+            
+        Returns:
+            IDs de los tickets en el mismo orden que la entrada
+        """
+        if not tickets:
+            return []
+        
+        # Validar todos los tickets antes de tocar la BD
+        for ticket in tickets:
+            is_valid, errors = self.validate_ticket(ticket)
+            if not is_valid:
+                error_msg = f"Ticket inválido: {'; '.join(errors)}"
+                logger.error(error_msg)
+                raise ValueError(error_msg)
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
             try:
-                # 1. Insertar o obtener tienda
-                tienda_id = self._insert_or_get_store(cursor, ticket)
-                
-                # 2. Obtener subscriptor_id si se proporciona email
+                # 1. Obtener subscriptor_id si se proporciona email
                 subscriptor_id = None
                 if subscriptor_email:
-                    subscriptor_id = self.get_or_create_subscriptor_id(subscriptor_email)
+                    subscriptor_id = self._get_or_create_subscriptor_id(cursor, subscriptor_email)
                 
-                # 3. Insertar ticket - IMPORTANTE: verificar si ya existe
-                ticket_id, is_duplicate = self._insert_ticket(cursor, ticket, tienda_id, subscriptor_id)
+                # 2. Insertar tiendas y tickets - IMPORTANTE: detectar duplicados
+                self._lock_new_stores(cursor, tickets)
+                resultados, tiendas = self._insert_tickets(cursor, tickets, subscriptor_id)
                 
-                # 3. Solo insertar productos si NO es duplicado
-                if not is_duplicate:
-                    self._insert_products(cursor, ticket, ticket_id)
-                    logger.info(f"✓ Ticket guardado - ID: {ticket_id}, Factura: {ticket.invoice_number}")
-                else:
-                    logger.warning(f"⚠️ Ticket duplicado detectado - ID: {ticket_id}, Factura: {ticket.invoice_number} - NO se insertaron productos")
+                # 3. Solo insertar productos de los tickets NO duplicados
+                nuevos = [
+                    (ticket_id, ticket)
+                    for ticket, (ticket_id, is_duplicate) in zip(tickets, resultados)
+                    if not is_duplicate
+                ]
+                if nuevos:
+                    self._insert_products(cursor, nuevos)
                 
-                return ticket_id
+                for ticket, (ticket_id, is_duplicate) in zip(tickets, resultados):
+                    if not is_duplicate:
+                        logger.info("✓ Ticket guardado - ID: %s, Factura: %s", ticket_id, ticket.invoice_number)
+                    else:
+                        logger.warning("⚠️ Ticket duplicado detectado - ID: %s, Factura: %s - NO se insertaron productos",
+                                       ticket_id, ticket.invoice_number)
                 
-            except Exception as e:
-                logger.error(f"Error guardando ticket: {e}")
-                logger.error(traceback.format_exc())
+            except Exception:
+                logger.exception("Error guardando ticket")
                 raise
+        
+        # Cachear las tiendas sólo tras el commit (un id revertido no existiría)
+        self._cache_after_commit(self._store_cache, tiendas)
+        
+        return [ticket_id for ticket_id, _ in resultados]
     
-    def _insert_or_get_store(self, cursor, ticket: TicketData) -> int:
-        """Inserta o obtiene la tienda."""
-        cursor.execute("""
-            INSERT INTO tiendas (nombre, cif, direccion, codigo_postal, ciudad, telefono)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON CONFLICT (cif) DO UPDATE SET
-                direccion = EXCLUDED.direccion,
-                codigo_postal = EXCLUDED.codigo_postal,
-                ciudad = EXCLUDED.ciudad,
-                telefono = EXCLUDED.telefono
-            RETURNING id
-        """, (
-            ticket.store_name, ticket.cif, ticket.address,
-            ticket.postal_code, ticket.city, ticket.phone
-        ))
-        result = cursor.fetchone()
-        if result is None:
-            raise ValueError("No se pudo obtener el ID de la tienda")
-        return result[0]
-    
-    def _insert_ticket(self, cursor, ticket: TicketData, tienda_id: int, subscriptor_id: int = None) -> Tuple[int, bool]:
+    def _lock_new_stores(self, cursor, tickets: List[TicketData]) -> None:
         """
-        Inserta el ticket principal.
+        Serializa la creación de tiendas que no están en caché.
         
-        Returns:
-            Tuple[int, bool]: (ticket_id, is_duplicate)
+        Si otra transacción crea la misma tienda sin haber confirmado aún, el
+        ON CONFLICT de _SAVE_TICKETS_SQL la salta pero su snapshot tampoco la
+        ve, y el ticket quedaría sin tienda_id. El advisory lock por CIF (en
+        orden, sin interbloqueos) hace esperar a que la otra confirme antes de
+        lanzar la sentencia. Con la caché caliente no se ejecuta.
         """
+        nuevas = sorted({t.cif for t in tickets if _lru_get(self._store_cache, t.cif) is None})
+        if nuevas:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(cif)) FROM unnest(%s::text[]) AS cif",
+                (nuevas,)
+            )
+    
+    def _ticket_row(self, orden: int, ticket: TicketData, subscriptor_id: Optional[int]) -> Tuple:
+        """Construye la fila (tienda + ticket) de un ticket para _SAVE_TICKETS_SQL."""
         # Preparar datos de IVA con conversión de tipos segura
         iva_data: Dict[str, Dict[str, Optional[float]]] = {
             '4%': {'base': None, 'cuota': None},
@@ -442,133 +874,182 @@ class PostgreSQLTicketStorage(TicketStorageBase):
                     'cuota': breakdown.get('cuota') # float → Optional[float]
                 }
         
-        cursor.execute("""
-            INSERT INTO tickets (
-                tienda_id, subscriptor_id, numero_pedido, numero_factura, fecha_compra, 
-                hora_compra, total, metodo_pago,
-                iva_4_base, iva_4_cuota,
-                iva_10_base, iva_10_cuota,
-                iva_21_base, iva_21_cuota
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (numero_factura) DO NOTHING
-            RETURNING id
-        """, (
-            tienda_id, subscriptor_id, ticket.order_number, ticket.invoice_number,
-            ticket.date, ticket.time, ticket.total, ticket.payment_method,
+        return (
+            orden, _lru_get(self._store_cache, ticket.cif),
+            ticket.store_name, ticket.cif, ticket.address,
+            ticket.postal_code, ticket.city, ticket.phone,
+            subscriptor_id, ticket.order_number, ticket.invoice_number,
+            _as_date(ticket.date), _as_time(ticket.time), ticket.total, ticket.payment_method,
             iva_data['4%']['base'], iva_data['4%']['cuota'],
             iva_data['10%']['base'], iva_data['10%']['cuota'],
             iva_data['21%']['base'], iva_data['21%']['cuota']
-        ))
+        )
+    
+    def _insert_tickets(self, cursor, tickets: List[TicketData],
+                        subscriptor_id: Optional[int] = None
+                        ) -> Tuple[List[Tuple[int, bool]], Dict[str, int]]:
+        """
+        Inserta tiendas y tickets en una sola sentencia.
         
-        result = cursor.fetchone()
-        if result is None:
-            # El ticket ya existe (conflicto con numero_factura)
-            cursor.execute("SELECT id FROM tickets WHERE numero_factura = %s", (ticket.invoice_number,))
-            existing = cursor.fetchone()
-            if existing is None:
-                raise ValueError("No se pudo obtener el ticket duplicado")
-            ticket_id = existing[0]
-            logger.warning(f"Ticket duplicado detectado: factura {ticket.invoice_number}, ID {ticket_id}")
-            return ticket_id, True  # ← is_duplicate = True
-        
-        return result[0], False  # ← is_duplicate = False
-    
-    def _insert_products(self, cursor, ticket: TicketData, ticket_id: int) -> None:
-        """Inserta los productos del ticket."""
+        Returns:
+            ((ticket_id, is_duplicate) por cada ticket, {cif: tienda_id})
+        """
+        rows = execute_values(
+            cursor, _SAVE_TICKETS_SQL,
+            [self._ticket_row(i, ticket, subscriptor_id) for i, ticket in enumerate(tickets)],
+            template=_SAVE_TICKETS_TEMPLATE,
+            page_size=_page_size(len(tickets)), fetch=True
+        )
+        
+        # Una factura que otra transacción confirma mientras este INSERT espera
+        # en el índice único se salta (DO NOTHING) pero no está en el snapshot
+        # de la sentencia, así que su id llega a NULL: se relee en otra sentencia
+        faltan = [row[0] for row in rows if row[1] is None]
+        existentes: Dict[str, int] = {}
+        if faltan:
+            cursor.execute(
+                "SELECT numero_factura, id FROM tickets WHERE numero_factura = ANY(%s)",
+                (faltan,)
+            )
+            existentes = dict(cursor.fetchall())
+        
+        resultados = []
+        tiendas: Dict[str, int] = {}
+        vistos = set()
+        for factura, ticket_id, duplicado, cif, tienda_id in rows:
+            tiendas[cif] = tienda_id
+            if ticket_id is None:
+                ticket_id = existentes.get(factura)
+            if ticket_id is None:
+                raise ValueError("No se pudo obtener el ID del ticket")
+            # Una factura repetida dentro del lote sólo se inserta la primera vez
+            if duplicado or factura in vistos:
+                logger.warning("Ticket duplicado detectado: factura %s, ID %s", factura, ticket_id)
+                resultados.append((ticket_id, True))  # ← is_duplicate = True
+            else:
+                resultados.append((ticket_id, False))  # ← is_duplicate = False
+            vistos.add(factura)
+        
+        return resultados, tiendas
+    
+    def _insert_products(self, cursor, tickets: List[Tuple[int, TicketData]]) -> None:
+        """Inserta los productos de los tickets (pares ticket_id, ticket)."""
         productos_data = [
             (
                 ticket_id, p.quantity, p.description,
                 p.unit_price, p.total_price, p.weight
             )
+            for ticket_id, ticket in tickets
             for p in ticket.products
         ]
         
-        execute_values(cursor, """
-            INSERT INTO productos (
-                ticket_id, cantidad, descripcion, precio_unitario, 
-                precio_total, peso
-            )
-            VALUES %s
-        """, productos_data)
+        if len(productos_data) < _COPY_MIN_ROWS:
+            # Una columna por array: la sentencia no crece con el número de filas
+            cursor.execute("""
+                INSERT INTO productos (
+                    ticket_id, cantidad, descripcion, precio_unitario, 
+                    precio_total, peso
+                )
+                SELECT * FROM UNNEST(
+                    %s::int[], %s::int[], %s::text[], %s::numeric[],
+                    %s::numeric[], %s::text[]
+                )
+            """, [list(columna) for columna in zip(*productos_data)])
+        else:
+            # COPY evita el análisis y planificación del INSERT para tickets grandes
+            _copy_rows(cursor, 'productos', _PRODUCT_COPY_COLUMNS, productos_data)
         
-        logger.debug(f"Insertados {len(productos_data)} productos para ticket {ticket_id}")
+        logger.debug("Insertados %d productos para %d tickets", len(productos_data), len(tickets))
+    
+    def bulk_load_products(self, rows: Iterable[Tuple]) -> int:
+        """
+        Carga productos de tickets ya existentes con un único COPY.
+        
+        Pensado para recargas masivas (p. ej. reprocesar tickets), donde COPY
+        es varias veces más rápido que INSERT. No valida ni detecta duplicados.
+        
+        Args:
+            rows: Tuplas (ticket_id, cantidad, descripcion, precio_unitario,
+                precio_total, peso)
+        
+        Returns:
+            Número de productos cargados
+        """
+        with self.get_connection() as conn:
+            num_rows = _copy_rows(conn.cursor(), 'productos', _PRODUCT_COPY_COLUMNS, rows)
+        
+        logger.info(f"Cargados {num_rows} productos con COPY")
+        return num_rows
     
     def get_ticket(self, ticket_id: int) -> Optional[Dict[str, Any]]:
         """Obtiene un ticket por su ID."""
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             
-            cursor.execute("""
-                SELECT 
-                    t.id, t.numero_pedido, t.numero_factura,
-                    t.fecha_compra, t.hora_compra, t.total, t.metodo_pago,
-                    ti.nombre, ti.cif, ti.direccion, ti.ciudad
-                FROM tickets t
-                JOIN tiendas ti ON t.tienda_id = ti.id
-                WHERE t.id = %s
-            """, (ticket_id,))
+            # Ticket, tienda y productos (agregados en JSON) en una sola consulta
+            self.execute_prepared(cursor, 'get_ticket', _SQL_GET_TICKET, (ticket_id,))
             
             row = cursor.fetchone()
             if not row:
                 return None
-                
-            # Convertir usando nombres de columna
-            columns = [desc[0] for desc in cursor.description]
-            ticket_dict = dict(zip(columns, row))
-            
-            # Obtener productos
-            cursor.execute("""
-                SELECT cantidad, descripcion, precio_unitario, precio_total, peso
-                FROM productos
-                WHERE ticket_id = %s
-                ORDER BY id
-            """, (ticket_id,))
             
-            productos = cursor.fetchall()
-            prod_columns = [desc[0] for desc in cursor.description]
+            (id_, numero_pedido, numero_factura, fecha, hora, total, metodo_pago,
+             nombre, cif, direccion, ciudad, productos) = row
             
             return {
-                'id': ticket_dict['id'],
-                'numero_pedido': ticket_dict['numero_pedido'],
-                'numero_factura': ticket_dict['numero_factura'],
-                'fecha': ticket_dict['fecha_compra'],
-                'hora': ticket_dict['hora_compra'],
-                'total': float(ticket_dict['total']),
-                'metodo_pago': ticket_dict['metodo_pago'],
+                'id': id_,
+                'numero_pedido': numero_pedido,
+                'numero_factura': numero_factura,
+                'fecha': fecha,
+                'hora': hora,
+                'total': total,
+                'metodo_pago': metodo_pago,
                 'tienda': {
-                    'nombre': ticket_dict['nombre'],
-                    'cif': ticket_dict['cif'],
-                    'direccion': ticket_dict['direccion'],
-                    'ciudad': ticket_dict['ciudad']
+                    'nombre': nombre,
+                    'cif': cif,
+                    'direccion': direccion,
+                    'ciudad': ciudad
                 },
-                'productos': [
-                    dict(zip(prod_columns, p))
-                    for p in productos
-                ]
+                'productos': productos
             }
     
-    def get_tickets_by_date_range(self, fecha_inicio: str, fecha_fin: str) -> List[Dict[str, Any]]:
+    def get_tickets_by_date_range(self, fecha_inicio: Union[str, date],
+                                  fecha_fin: Union[str, date]) -> List[Dict[str, Any]]:
         """Obtiene tickets en un rango de fechas."""
+        return list(self.iter_tickets_by_date_range(fecha_inicio, fecha_fin))
+    
+    def iter_tickets_by_date_range(self, fecha_inicio: Union[str, date],
+                                   fecha_fin: Union[str, date],
+                                   itersize: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los tickets de un rango de fechas sin cargarlos todos en memoria.
+        
+        Usa un cursor de servidor que trae las filas en bloques de ``itersize``.
+        La conexión queda ocupada hasta que se agota el iterador.
+        """
+        # Los cursores con nombre necesitan transacción (no sirve autocommit).
+        # Nombre único: dentro de batch() varios iteradores comparten conexión
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = conn.cursor(name=f'tickets_por_fecha_{uuid4().hex}',
+                                 cursor_factory=RealDictCursor)
+            cursor.itersize = itersize
             
             cursor.execute("""
                 SELECT id, numero_factura, fecha_compra, total
                 FROM tickets
                 WHERE fecha_compra BETWEEN %s AND %s
                 ORDER BY fecha_compra DESC
-            """, (fecha_inicio, fecha_fin))
+            """, (_as_date(fecha_inicio), _as_date(fecha_fin)))
             
-            columns = [desc[0] for desc in cursor.description]
-            return [
-                dict(zip(columns, row))
-                for row in cursor.fetchall()
-            ]
+            try:
+                yield from cursor
+            finally:
+                cursor.close()
     
-    def get_total_gastado(self, fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None) -> float:
+    def get_total_gastado(self, fecha_inicio: Optional[Union[str, date]] = None,
+                          fecha_fin: Optional[Union[str, date]] = None) -> float:
         """Calcula el total gastado en un periodo."""
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             
             if fecha_inicio and fecha_fin:
@@ -576,17 +1057,17 @@ class PostgreSQLTicketStorage(TicketStorageBase):
                     SELECT COALESCE(SUM(total), 0) as total_gastado
                     FROM tickets
                     WHERE fecha_compra BETWEEN %s AND %s
-                """, (fecha_inicio, fecha_fin))
+                """, (_as_date(fecha_inicio), _as_date(fecha_fin)))
             else:
                 cursor.execute("SELECT COALESCE(SUM(total), 0) as total_gastado FROM tickets")
             
             result = cursor.fetchone()
-            return float(result[0]) if result else 0.0
+            return result[0] if result else 0.0
     
     def get_productos_mas_comprados(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Obtiene los productos más comprados."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        with self.get_connection(readonly=True) as conn:
+            cursor = self._dict_cursor(conn)
             
             cursor.execute("""
                 SELECT 
@@ -601,11 +1082,7 @@ class PostgreSQLTicketStorage(TicketStorageBase):
                 LIMIT %s
             """, (limit,))
             
-            columns = [desc[0] for desc in cursor.description]
-            return [
-                dict(zip(columns, row))
-                for row in cursor.fetchall()
-            ]
+            return cursor.fetchall()
 
     def test_connection(self) -> bool:
         """Test de conexión a la base de datos."""
@@ -615,18 +1092,28 @@ class PostgreSQLTicketStorage(TicketStorageBase):
                 cursor.execute("SELECT 1")
                 return True
         except Exception as e:
-            logger.error(f"Error en test de conexión: {e}")
+            logger.error("Error en test de conexión: %s", e)
             return False
 
     def get_ticket_by_id(self, ticket_id: int) -> Optional[TicketData]:
         """Obtiene un ticket por su ID."""
+        return self._load_ticket('t.id', ticket_id)
+    
+    def _load_ticket(self, columna: str, valor: Any) -> Optional[TicketData]:
+        """
+        Reconstruye un TicketData buscando por una columna única de tickets.
+        
+        Args:
+            columna: Columna de búsqueda ('t.id' o 't.numero_factura')
+            valor: Valor buscado
+        """
         if self.debug_queries:
-            logger.info(f"🎯 get_ticket_by_id({ticket_id}) - INICIO")
+            logger.info(f"🎯 get_ticket({columna}={valor}) - INICIO")
             
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        with self.get_connection(readonly=True) as conn:
+            cursor = self._dict_cursor(conn)
             
-            # 1. Consultar ticket
+            # Ticket, tienda y productos (agregados en JSON) en una sola consulta
             ticket_query = """
                 SELECT 
                     t.id, t.tienda_id, t.numero_pedido, t.numero_factura,
@@ -635,68 +1122,57 @@ class PostgreSQLTicketStorage(TicketStorageBase):
                     t.iva_10_base, t.iva_10_cuota,
                     t.iva_21_base, t.iva_21_cuota,
                     ti.nombre as tienda_nombre, ti.cif, ti.direccion,
-                    ti.codigo_postal, ti.ciudad, ti.telefono
+                    ti.codigo_postal, ti.ciudad, ti.telefono,
+                    COALESCE((
+                        SELECT json_agg(json_build_object(
+                            'descripcion', p.descripcion,
+                            'cantidad', p.cantidad,
+                            'precio_unitario', p.precio_unitario,
+                            'precio_total', p.precio_total,
+                            'peso', p.peso
+                        ) ORDER BY p.id)
+                        FROM productos p
+                        WHERE p.ticket_id = t.id
+                    ), '[]'::json) AS productos
                 FROM tickets t
                 LEFT JOIN tiendas ti ON t.tienda_id = ti.id
-                WHERE t.id = %s
-            """
+                WHERE {columna} = %s
+            """.format(columna=columna)
             
             if self.debug_queries:
                 logger.info(f"🔍 SQL [GET_TICKET]: {' '.join(ticket_query.split())}")
-                logger.info(f"🔍 PARAMS: ({ticket_id},)")
+                logger.info(f"🔍 PARAMS: ({valor!r},)")
             
-            cursor.execute(ticket_query, (ticket_id,))
-            row = cursor.fetchone()
+            cursor.execute(ticket_query, (valor,))
+            ticket_dict = cursor.fetchone()
             
-            if not row:
+            if not ticket_dict:
                 if self.debug_queries:
-                    logger.info(f"❌ No se encontró ticket con ID {ticket_id}")
+                    logger.info(f"❌ No se encontró ticket con {columna} = {valor}")
                 return None
             
-            # Convertir usando nombres de columna
-            columns = [desc[0] for desc in cursor.description]
-            ticket_dict = dict(zip(columns, row))
-            
             if self.debug_queries:
                 logger.info(f"✅ Ticket encontrado: {ticket_dict['numero_factura']}")
             
-            # 2. Consultar productos
-            products_query = """
-                SELECT descripcion, cantidad, precio_unitario, precio_total, peso
-                FROM productos
-                WHERE ticket_id = %s
-                ORDER BY id
-            """
-            
-            if self.debug_queries:
-                logger.info(f"🔍 SQL [GET_PRODUCTS]: {' '.join(products_query.split())}")
-                logger.info(f"🔍 PARAMS: ({ticket_id},)")
-            
-            cursor.execute(products_query, (ticket_id,))
-            product_rows = cursor.fetchall()
+            product_rows = ticket_dict['productos']
             
             if self.debug_queries:
-                logger.info(f"📦 Productos encontrados: {len(product_rows)} para ticket {ticket_id}")
-            
-            products = []
-            for i, prod_row in enumerate(product_rows):
-                prod_columns = [desc[0] for desc in cursor.description]
-                prod_dict = dict(zip(prod_columns, prod_row))
-                
-                if self.debug_queries and i < 3:  # Solo los primeros 3
-                    logger.info(f"   📦 {i+1}: {prod_dict['descripcion']} - {prod_dict['cantidad']} x {prod_dict['precio_total']}€")
-                
-                product_data = Product(
+                logger.info(f"📦 Productos encontrados: {len(product_rows)} para ticket {ticket_dict['id']}")
+                for i, prod_dict in enumerate(product_rows[:3], 1):  # Solo los primeros 3
+                    logger.info(f"   📦 {i}: {prod_dict['descripcion']} - {prod_dict['cantidad']} x {prod_dict['precio_total']}€")
+                if len(product_rows) > 3:
+                    logger.info(f"   📦 ... y {len(product_rows) - 3} productos más")
+            
+            products = [
+                Product(
                     quantity=prod_dict['cantidad'],
                     description=prod_dict['descripcion'],
-                    unit_price=float(prod_dict['precio_unitario']) if prod_dict['precio_unitario'] else 0.0,
-                    total_price=float(prod_dict['precio_total']),
+                    unit_price=prod_dict['precio_unitario'] or 0.0,
+                    total_price=prod_dict['precio_total'],
                     weight=prod_dict.get('peso', '')
                 )
-                products.append(product_data)
-            
-            if self.debug_queries and len(product_rows) > 3:
-                logger.info(f"   📦 ... y {len(product_rows) - 3} productos más")
+                for prod_dict in product_rows
+            ]
             
             # Reconstruir desglose de IVA desde la BD
             iva_breakdown: Dict[str, Dict[str, float]] = {}
@@ -704,22 +1180,22 @@ class PostgreSQLTicketStorage(TicketStorageBase):
             # IVA 4%
             if ticket_dict.get('iva_4_base') or ticket_dict.get('iva_4_cuota'):
                 iva_breakdown['4%'] = {
-                    'base': float(ticket_dict['iva_4_base']) if ticket_dict['iva_4_base'] else 0.0,
-                    'cuota': float(ticket_dict['iva_4_cuota']) if ticket_dict['iva_4_cuota'] else 0.0
+                    'base': ticket_dict['iva_4_base'] or 0.0,
+                    'cuota': ticket_dict['iva_4_cuota'] or 0.0
                 }
             
             # IVA 10%
             if ticket_dict.get('iva_10_base') or ticket_dict.get('iva_10_cuota'):
                 iva_breakdown['10%'] = {
-                    'base': float(ticket_dict['iva_10_base']) if ticket_dict['iva_10_base'] else 0.0,
-                    'cuota': float(ticket_dict['iva_10_cuota']) if ticket_dict['iva_10_cuota'] else 0.0
+                    'base': ticket_dict['iva_10_base'] or 0.0,
+                    'cuota': ticket_dict['iva_10_cuota'] or 0.0
                 }
             
             # IVA 21%
             if ticket_dict.get('iva_21_base') or ticket_dict.get('iva_21_cuota'):
                 iva_breakdown['21%'] = {
-                    'base': float(ticket_dict['iva_21_base']) if ticket_dict['iva_21_base'] else 0.0,
-                    'cuota': float(ticket_dict['iva_21_cuota']) if ticket_dict['iva_21_cuota'] else 0.0
+                    'base': ticket_dict['iva_21_base'] or 0.0,
+                    'cuota': ticket_dict['iva_21_cuota'] or 0.0
                 }
             
             # Crear TicketData desde BD con todos los campos requeridos
@@ -735,7 +1211,7 @@ class PostgreSQLTicketStorage(TicketStorageBase):
                 order_number=str(ticket_dict['numero_pedido']) if ticket_dict['numero_pedido'] else "",
                 invoice_number=str(ticket_dict['numero_factura']),
                 products=products,
-                total=float(ticket_dict['total']),
+                total=ticket_dict['total'],
                 payment_method=str(ticket_dict['metodo_pago']) if ticket_dict['metodo_pago'] else "",
                 iva_breakdown=iva_breakdown
             )
@@ -744,24 +1220,17 @@ class PostgreSQLTicketStorage(TicketStorageBase):
             setattr(ticket, 'id', ticket_dict['id'])
             
             if self.debug_queries:
-                logger.info(f"🎯 get_ticket_by_id({ticket_id}) - FIN: {len(products)} productos creados")
+                logger.info(f"🎯 get_ticket({columna}={valor}) - FIN: {len(products)} productos creados")
             
             return ticket
 
     def get_ticket_by_invoice(self, invoice_number: str) -> Optional[TicketData]:
         """Obtiene un ticket por número de factura."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM tickets WHERE numero_factura = %s", (invoice_number,))
-            result = cursor.fetchone()
-            
-            if result:
-                return self.get_ticket_by_id(result[0])
-            return None
+        return self._load_ticket('t.numero_factura', invoice_number)
 
     def get_products_by_ticket_id(self, ticket_id: int) -> List[Product]:
         """Obtiene productos de un ticket específico."""
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT descripcion, cantidad, precio_unitario, precio_total, peso
@@ -770,21 +1239,17 @@ class PostgreSQLTicketStorage(TicketStorageBase):
                 ORDER BY id
             """, (ticket_id,))
             
-            columns = [desc[0] for desc in cursor.description]
-            products = []
-            for row in cursor.fetchall():
-                product_dict = dict(zip(columns, row))
-                
-                product = Product(
-                    quantity=product_dict['cantidad'],
-                    description=product_dict['descripcion'],
-                    unit_price=float(product_dict['precio_unitario']) if product_dict['precio_unitario'] else 0.0,
-                    total_price=float(product_dict['precio_total']),
-                    weight=product_dict.get('peso', '')
+            # Tuplas desempaquetadas en el orden del SELECT, sin diccionario por fila
+            return [
+                Product(
+                    quantity=cantidad,
+                    description=descripcion,
+                    unit_price=precio_unitario or 0.0,
+                    total_price=precio_total,
+                    weight=peso
                 )
-                products.append(product)
-            
-            return products
+                for descripcion, cantidad, precio_unitario, precio_total, peso in cursor
+            ]
 
     def delete_test_tickets(self, ticket_ids: List[int]) -> None:
         """Elimina tickets de prueba (para limpieza en tests)."""
@@ -794,17 +1259,16 @@ class PostgreSQLTicketStorage(TicketStorageBase):
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Eliminar productos asociados (CASCADE debería hacerlo automáticamente)
+            # Productos y tickets en una sola sentencia; el borrado explícito de
+            # productos no depende de que la FK de la tabla tenga ON DELETE CASCADE
             cursor.execute("""
-                DELETE FROM productos 
-                WHERE ticket_id = ANY(%s)
-            """, (ticket_ids,))
-            
-            # Eliminar tickets
-            cursor.execute("""
-                DELETE FROM tickets 
+                WITH productos_borrados AS (
+                    DELETE FROM productos
+                    WHERE ticket_id = ANY(%s)
+                )
+                DELETE FROM tickets
                 WHERE id = ANY(%s)
-            """, (ticket_ids,))
+            """, (ticket_ids, ticket_ids))
             
             logger.info(f"Eliminados {len(ticket_ids)} tickets de prueba")
             
@@ -818,7 +1282,7 @@ class PostgreSQLTicketStorage(TicketStorageBase):
         Returns:
             Email del subscriptor o None si no se encuentra
         """
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -832,6 +1296,9 @@ class PostgreSQLTicketStorage(TicketStorageBase):
             return result[0] if result else None
 
     def close(self) -> None:
-        """Cierra la conexión (no necesario con context managers)."""
-        # Los context managers manejan las conexiones automáticamente
-        pass
\ No newline at end of file
+        """Cierra todas las conexiones del pool."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+                logger.debug("Pool de conexiones cerrado")
\ No newline at end of file
@@ -3,16 +3,180 @@ Cargador de productos de Mercadona en la base de datos.
 """
 
 import json
+import re
 import psycopg2
-from typing import Dict, List, Any, Optional, Tuple
-from decimal import Decimal
+from itertools import islice
+from psycopg2.extras import execute_values
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from decimal import Decimal, InvalidOperation
 from datetime import datetime
 
 from ..config import get_logger, DatabaseConfig
 from .base import TicketStorageBase
+from .postgresql import _copy_rows
 
 logger = get_logger(__name__)
 
+# Valores del JSON que se cargan como NULL y cadenas que cuentan como verdadero
+_NULL_SENTINELS = frozenset(('', 'N/A'))
+_TRUTHY = frozenset(('true', '1', 'yes', 'on'))
+
+# Serializador JSON compacto reutilizado para las columnas JSONB; el texto
+# resultante vale tanto para execute_values como para COPY (a diferencia de
+# psycopg2.extras.Json, que sólo se adapta dentro de una sentencia SQL)
+_json_dumps = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+_json_decoder = json.JSONDecoder()
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_UPSERT_COLUMNS = (
+    'id', 'slug', 'display_name', 'packaging', 'published', 'share_url', 'thumbnail', 'product_limit',
+    'unit_price', 'bulk_price', 'reference_price', 'previous_unit_price', 'price_decreased',
+    'tax_percentage', 'iva', 'is_new',
+    'unit_name', 'unit_size', 'size_format', 'reference_format', 'is_pack', 'pack_size',
+    'total_units', 'drained_weight',
+    'unit_selector', 'bunch_selector', 'selling_method', 'min_bunch_amount',
+    'increment_bunch_amount', 'approx_size',
+    'badges', 'status', 'unavailable_from', 'unavailable_weekdays', 'api_categories',
+    'categoria_id', 'categoria_name', 'subcategoria_id', 'subcategoria_name',
+    'nested_category_id', 'nested_category_name', 'extraction_date'
+)
+
+_UPSERT_COLUMN_LIST = ', '.join(_UPSERT_COLUMNS)
+# Columnas que el upsert actualiza en un producto ya existente (todas salvo la clave)
+_UPDATE_COLUMNS = tuple(columna for columna in _UPSERT_COLUMNS if columna != 'id')
+
+# Upsert de productos; {origen} es VALUES %s (execute_values) o la tabla temporal.
+# El SET y la comparación se generan desde _UPDATE_COLUMNS; la condición WHERE
+# descarta las filas idénticas a las ya guardadas, que no se reescriben (ni
+# heap, ni WAL, ni índices) y tampoco aparecen en RETURNING.
+# Devuelve (insertados, actualizados): (xmax = 0) sólo es cierto en filas recién
+# insertadas, y se cuenta en el servidor para recibir una fila y no una por producto
+_UPSERT_BASE_SQL = f"""
+    WITH upsert AS (
+        INSERT INTO mercadona_productos ({_UPSERT_COLUMN_LIST}) {{origen}}
+        ON CONFLICT (id) DO UPDATE SET
+            {', '.join(f'{columna} = EXCLUDED.{columna}' for columna in _UPDATE_COLUMNS)},
+            updated_at = CURRENT_TIMESTAMP
+        WHERE ({', '.join(f'mercadona_productos.{columna}' for columna in _UPDATE_COLUMNS)})
+            IS DISTINCT FROM ({', '.join(f'EXCLUDED.{columna}' for columna in _UPDATE_COLUMNS)})
+        RETURNING (xmax = 0) AS nuevo
+    )
+    SELECT COUNT(*) FILTER (WHERE nuevo), COUNT(*) FILTER (WHERE NOT nuevo)
+    FROM upsert
+"""
+
+_UPSERT_SQL = _UPSERT_BASE_SQL.format(origen="VALUES %s")
+
+# Carga masiva: COPY a una tabla temporal y un único INSERT ... SELECT desde ella
+_COPY_MIN_ROWS = 1000
+
+# Posiciones de los campos obligatorios en la fila preparada
+_ID = _UPSERT_COLUMNS.index('id')
+_DISPLAY_NAME = _UPSERT_COLUMNS.index('display_name')
+
+_MERGE_STAGING_SQL = _UPSERT_BASE_SQL.format(
+    origen=f"SELECT {_UPSERT_COLUMN_LIST} FROM mercadona_productos_stg"
+)
+
+# insert_product: sentencia preparada una vez por conexión y ejecutada por nombre
+_PREPARE_UPSERT_SQL = "PREPARE mercadona_upsert AS " + _UPSERT_BASE_SQL.format(
+    origen="VALUES (" + ", ".join(f"${i}" for i in range(1, len(_UPSERT_COLUMNS) + 1)) + ")"
+)
+_EXECUTE_UPSERT_SQL = f"EXECUTE mercadona_upsert ({', '.join(['%s'] * len(_UPSERT_COLUMNS))})"
+
+# Fila posicional en el orden de _UPSERT_COLUMNS, tal y como la devuelve _prepare_product_data
+_UPSERT_TEMPLATE = "(" + ", ".join(["%s"] * len(_UPSERT_COLUMNS)) + ")"
+
+
+def _clip(texto: Optional[str], limite: int) -> Optional[str]:
+    """Recorta un texto opcional al ancho de su columna VARCHAR (vacío -> NULL)."""
+    if not texto:
+        return None
+    return texto if len(texto) <= limite else texto[:limite]
+
+
+def _as_json(valor: Any) -> str:
+    """
+    Texto JSON de un valor para una columna JSONB.
+    
+    Un objeto o lista que ya llega codificado como cadena se usa tal cual en
+    lugar de volver a serializarlo (lo que además lo convertiría en una cadena
+    JSON con el objeto escapado dentro).
+    """
+    if valor.__class__ is str and valor[:1] in ('{', '['):
+        return valor
+    return _json_dumps(valor)
+
+
+def _iter_json_products(texto: str) -> Iterator[Dict[str, Any]]:
+    """
+    Recorre la lista 'products' del JSON de extracción producto a producto.
+    
+    Cada producto se decodifica al pedirlo (el resto de claves de primer nivel
+    se decodifican y descartan), así que en memoria sólo están el texto del
+    archivo y el lote en curso, no el grafo completo de objetos.
+    
+    Args:
+        texto: Contenido del archivo JSON generado por save_to_json
+        
+    Yields:
+        Diccionario de cada producto, en el orden del archivo
+    """
+    def saltar(pos: int) -> int:
+        return _JSON_WHITESPACE.match(texto, pos).end()
+    
+    def separador(pos: int, fin: str) -> Tuple[bool, int]:
+        # (se ha cerrado el contenedor, posición tras el separador)
+        caracter = texto[pos:pos + 1]
+        if caracter not in (',', fin):
+            raise ValueError(f"JSON de productos mal formado en la posición {pos}")
+        return caracter == fin, saltar(pos + 1)
+    
+    pos = saltar(0)
+    if texto[pos:pos + 1] != '{':
+        raise ValueError("El JSON de productos debe ser un objeto")
+    pos = saltar(pos + 1)
+    cerrado = texto[pos:pos + 1] == '}'
+    
+    while not cerrado:
+        clave, pos = _json_decoder.raw_decode(texto, pos)
+        pos = saltar(pos)
+        if texto[pos:pos + 1] != ':':
+            raise ValueError(f"JSON de productos mal formado en la posición {pos}")
+        pos = saltar(pos + 1)
+        
+        if clave == 'products' and texto[pos:pos + 1] == '[':
+            pos = saltar(pos + 1)
+            fin_lista = texto[pos:pos + 1] == ']'
+            if fin_lista:
+                pos = saltar(pos + 1)
+            while not fin_lista:
+                producto, pos = _json_decoder.raw_decode(texto, pos)
+                yield producto
+                fin_lista, pos = separador(saltar(pos), ']')
+        else:
+            _, pos = _json_decoder.raw_decode(texto, pos)
+            pos = saltar(pos)
+        
+        cerrado, pos = separador(pos, '}')
+
+
+def _iter_ndjson_products(json_file: str) -> Iterator[Dict[str, Any]]:
+    """
+    Recorre un archivo NDJSON (un producto por línea) sin cargarlo entero.
+    
+    Args:
+        json_file: Archivo generado por save_to_ndjson
+        
+    Yields:
+        Diccionario de cada producto, en el orden del archivo
+    """
+    with open(json_file, 'rb') as f:
+        for linea in f:
+            if linea.strip():
+                yield json.loads(linea)
+
 
 class MercadonaProductLoader:
     """Cargador de productos de Mercadona en PostgreSQL."""
@@ -26,17 +190,14 @@ class MercadonaProductLoader:
         """
         self.db_config = db_config
         self.connection = None
+        # Si la sesión actual ya tiene preparada la sentencia de upsert
+        self._upsert_prepared = False
         
     def connect(self):
         """Establece conexión con la base de datos."""
         try:
-            self.connection = psycopg2.connect(
-                host=self.db_config.host,
-                port=self.db_config.port,
-                database=self.db_config.database,
-                user=self.db_config.user,
-                password=self.db_config.password
-            )
+            self.connection = psycopg2.connect(**self.db_config.connection_params())
+            self._upsert_prepared = False
             logger.info("✓ Conectado a la base de datos para carga de productos")
             
         except Exception as e:
@@ -60,16 +221,24 @@ class MercadonaProductLoader:
     
     def _safe_decimal(self, value: Any) -> Optional[Decimal]:
         """Convierte un valor a Decimal de forma segura."""
-        if value is None or value == '' or value == 'N/A':
+        cls = value.__class__
+        if cls is Decimal:
+            return value
+        if cls is int:
+            return Decimal(value)
+        if value is None or (cls is str and value in _NULL_SENTINELS):
             return None
         try:
             return Decimal(str(value))
-        except (ValueError, TypeError):
+        except (ValueError, TypeError, InvalidOperation):
             return None
     
     def _safe_int(self, value: Any) -> Optional[int]:
         """Convierte un valor a int de forma segura."""
-        if value is None or value == '' or value == 'N/A':
+        cls = value.__class__
+        if cls is int:
+            return value
+        if value is None or (cls is str and value in _NULL_SENTINELS):
             return None
         try:
             return int(value)
@@ -78,88 +247,98 @@ class MercadonaProductLoader:
     
     def _safe_bool(self, value: Any) -> bool:
         """Convierte un valor a bool de forma segura."""
-        if isinstance(value, bool):
+        cls = value.__class__
+        if cls is bool:
             return value
-        if isinstance(value, str):
-            return value.lower() in ('true', '1', 'yes', 'on')
+        if cls is str:
+            return value in _TRUTHY or value.lower() in _TRUTHY
         return bool(value)
     
-    def _prepare_product_data(self, product: Dict[str, Any]) -> Dict[str, Any]:
+    def _prepare_product_data(self, product: Dict[str, Any],
+                              now: Optional[datetime] = None) -> Tuple[Any, ...]:
         """
         Prepara los datos del producto para inserción en la base de datos.
         
         Args:
             product: Datos del producto desde JSON
+            now: Fecha de extracción por defecto (la hora actual si no se indica)
             
         Returns:
-            Diccionario con datos preparados para PostgreSQL
+            Tupla con los valores en el orden de _UPSERT_COLUMNS
         """
+        get = product.get
+        safe_decimal, safe_int, safe_bool = self._safe_decimal, self._safe_int, self._safe_bool
+        
         # Convertir string de fecha a timestamp si es necesario
-        extraction_date = product.get('extraction_date')
+        # ('YYYY-MM-DD HH:MM:SS'; fromisoformat acepta el espacio como separador)
+        extraction_date = get('extraction_date')
         if isinstance(extraction_date, str):
             try:
-                extraction_date = datetime.strptime(extraction_date, '%Y-%m-%d %H:%M:%S')
+                extraction_date = datetime.fromisoformat(extraction_date)
             except ValueError:
-                extraction_date = datetime.now()
+                extraction_date = now or datetime.now()
         elif not extraction_date:
-            extraction_date = datetime.now()
+            extraction_date = now or datetime.now()
+        
+        # badges se usa como valor y como condición: se consulta una sola vez
+        badges = get('badges')
         
-        return {
-            'id': str(product.get('id', '')),
-            'slug': product.get('slug', '')[:200],
-            'display_name': product.get('display_name', '')[:300],
-            'packaging': product.get('packaging', '')[:100] if product.get('packaging') else None,
-            'published': self._safe_bool(product.get('published', True)),
-            'share_url': product.get('share_url'),
-            'thumbnail': product.get('thumbnail'),
-            'product_limit': self._safe_int(product.get('limit')),
+        return (
+            str(get('id', '')),
+            get('slug', '')[:200],
+            get('display_name', '')[:300],
+            _clip(get('packaging'), 100),
+            safe_bool(get('published', True)),
+            get('share_url'),
+            get('thumbnail'),
+            safe_int(get('limit')),
             
             # Precios
-            'unit_price': self._safe_decimal(product.get('unit_price')),
-            'bulk_price': self._safe_decimal(product.get('bulk_price')),
-            'reference_price': self._safe_decimal(product.get('reference_price')),
-            'previous_unit_price': self._safe_decimal(product.get('previous_unit_price')),
-            'price_decreased': self._safe_bool(product.get('price_decreased', False)),
-            'tax_percentage': self._safe_decimal(product.get('tax_percentage')),
-            'iva': self._safe_int(product.get('iva')),
-            'is_new': self._safe_bool(product.get('is_new', False)),
+            safe_decimal(get('unit_price')),
+            safe_decimal(get('bulk_price')),
+            safe_decimal(get('reference_price')),
+            safe_decimal(get('previous_unit_price')),
+            safe_bool(get('price_decreased', False)),
+            safe_decimal(get('tax_percentage')),
+            safe_int(get('iva')),
+            safe_bool(get('is_new', False)),
             
             # Tamaños y empaque
-            'unit_name': product.get('unit_name', '')[:50] if product.get('unit_name') else None,
-            'unit_size': self._safe_decimal(product.get('unit_size')),
-            'size_format': product.get('size_format', '')[:20] if product.get('size_format') else None,
-            'reference_format': product.get('reference_format', '')[:20] if product.get('reference_format') else None,
-            'is_pack': self._safe_bool(product.get('is_pack', False)),
-            'pack_size': self._safe_decimal(product.get('pack_size')),
-            'total_units': self._safe_int(product.get('total_units')),
-            'drained_weight': self._safe_decimal(product.get('drained_weight')),
+            _clip(get('unit_name'), 50),
+            safe_decimal(get('unit_size')),
+            _clip(get('size_format'), 20),
+            _clip(get('reference_format'), 20),
+            safe_bool(get('is_pack', False)),
+            safe_decimal(get('pack_size')),
+            safe_int(get('total_units')),
+            safe_decimal(get('drained_weight')),
             
             # Selectores
-            'unit_selector': self._safe_bool(product.get('unit_selector', False)),
-            'bunch_selector': self._safe_bool(product.get('bunch_selector', False)),
-            'selling_method': self._safe_int(product.get('selling_method')),
-            'min_bunch_amount': self._safe_decimal(product.get('min_bunch_amount')),
-            'increment_bunch_amount': self._safe_decimal(product.get('increment_bunch_amount')),
-            'approx_size': self._safe_bool(product.get('approx_size', False)),
+            safe_bool(get('unit_selector', False)),
+            safe_bool(get('bunch_selector', False)),
+            safe_int(get('selling_method')),
+            safe_decimal(get('min_bunch_amount')),
+            safe_decimal(get('increment_bunch_amount')),
+            safe_bool(get('approx_size', False)),
             
             # JSON fields
-            'badges': json.dumps(product.get('badges', {})) if product.get('badges') else None,
-            'status': product.get('status'),
-            'unavailable_from': None,  # TODO: parsear si viene como string
-            'unavailable_weekdays': json.dumps(product.get('unavailable_weekdays', [])),
-            'api_categories': json.dumps(product.get('categories', [])),
+            _as_json(badges) if badges else None,
+            get('status'),
+            None,  # unavailable_from; TODO: parsear si viene como string
+            _as_json(get('unavailable_weekdays', [])),
+            _as_json(get('categories', [])),
             
             # Contexto
-            'categoria_id': self._safe_int(product.get('category_id')),
-            'categoria_name': product.get('category_name', '')[:100] if product.get('category_name') else None,
-            'subcategoria_id': self._safe_int(product.get('subcategory_id')),
-            'subcategoria_name': product.get('subcategory_name', '')[:100] if product.get('subcategory_name') else None,
-            'nested_category_id': self._safe_int(product.get('nested_category_id')),
-            'nested_category_name': product.get('nested_category_name', '')[:100] if product.get('nested_category_name') else None,
+            safe_int(get('category_id')),
+            _clip(get('category_name'), 100),
+            safe_int(get('subcategory_id')),
+            _clip(get('subcategory_name'), 100),
+            safe_int(get('nested_category_id')),
+            _clip(get('nested_category_name'), 100),
             
             # Metadatos
-            'extraction_date': extraction_date
-        }
+            extraction_date,
+        )
     
     def insert_product(self, product: Dict[str, Any]) -> bool:
         """
@@ -178,101 +357,53 @@ class MercadonaProductLoader:
             prepared_data = self._prepare_product_data(product)
             
             # Validar datos mínimos requeridos
-            if not prepared_data['id'] or not prepared_data['display_name']:
-                logger.warning(f"Producto con datos insuficientes: {prepared_data.get('id', 'sin ID')}")
+            if not prepared_data[_ID] or not prepared_data[_DISPLAY_NAME]:
+                logger.warning(f"Producto con datos insuficientes: {prepared_data[_ID] or 'sin ID'}")
                 return False
             
             cursor = self.connection.cursor()
-            
-            # INSERT con ON CONFLICT para manejar duplicados
-            insert_sql = """
-                INSERT INTO mercadona_productos (
-                    id, slug, display_name, packaging, published, share_url, thumbnail, product_limit,
-                    unit_price, bulk_price, reference_price, previous_unit_price, price_decreased, 
-                    tax_percentage, iva, is_new,
-                    unit_name, unit_size, size_format, reference_format, is_pack, pack_size, 
-                    total_units, drained_weight,
-                    unit_selector, bunch_selector, selling_method, min_bunch_amount, 
-                    increment_bunch_amount, approx_size,
-                    badges, status, unavailable_from, unavailable_weekdays, api_categories,
-                    categoria_id, categoria_name, subcategoria_id, subcategoria_name,
-                    nested_category_id, nested_category_name, extraction_date
-                ) VALUES (
-                    %(id)s, %(slug)s, %(display_name)s, %(packaging)s, %(published)s, %(share_url)s, 
-                    %(thumbnail)s, %(product_limit)s,
-                    %(unit_price)s, %(bulk_price)s, %(reference_price)s, %(previous_unit_price)s, 
-                    %(price_decreased)s, %(tax_percentage)s, %(iva)s, %(is_new)s,
-                    %(unit_name)s, %(unit_size)s, %(size_format)s, %(reference_format)s, %(is_pack)s, 
-                    %(pack_size)s, %(total_units)s, %(drained_weight)s,
-                    %(unit_selector)s, %(bunch_selector)s, %(selling_method)s, %(min_bunch_amount)s, 
-                    %(increment_bunch_amount)s, %(approx_size)s,
-                    %(badges)s, %(status)s, %(unavailable_from)s, %(unavailable_weekdays)s, 
-                    %(api_categories)s,
-                    %(categoria_id)s, %(categoria_name)s, %(subcategoria_id)s, %(subcategoria_name)s,
-                    %(nested_category_id)s, %(nested_category_name)s, %(extraction_date)s
-                )
-                ON CONFLICT (id) DO UPDATE SET
-                    slug = EXCLUDED.slug,
-                    display_name = EXCLUDED.display_name,
-                    packaging = EXCLUDED.packaging,
-                    published = EXCLUDED.published,
-                    share_url = EXCLUDED.share_url,
-                    thumbnail = EXCLUDED.thumbnail,
-                    product_limit = EXCLUDED.product_limit,
-                    unit_price = EXCLUDED.unit_price,
-                    bulk_price = EXCLUDED.bulk_price,
-                    reference_price = EXCLUDED.reference_price,
-                    previous_unit_price = EXCLUDED.previous_unit_price,
-                    price_decreased = EXCLUDED.price_decreased,
-                    tax_percentage = EXCLUDED.tax_percentage,
-                    iva = EXCLUDED.iva,
-                    is_new = EXCLUDED.is_new,
-                    unit_name = EXCLUDED.unit_name,
-                    unit_size = EXCLUDED.unit_size,
-                    size_format = EXCLUDED.size_format,
-                    reference_format = EXCLUDED.reference_format,
-                    is_pack = EXCLUDED.is_pack,
-                    pack_size = EXCLUDED.pack_size,
-                    total_units = EXCLUDED.total_units,
-                    drained_weight = EXCLUDED.drained_weight,
-                    unit_selector = EXCLUDED.unit_selector,
-                    bunch_selector = EXCLUDED.bunch_selector,
-                    selling_method = EXCLUDED.selling_method,
-                    min_bunch_amount = EXCLUDED.min_bunch_amount,
-                    increment_bunch_amount = EXCLUDED.increment_bunch_amount,
-                    approx_size = EXCLUDED.approx_size,
-                    badges = EXCLUDED.badges,
-                    status = EXCLUDED.status,
-                    unavailable_from = EXCLUDED.unavailable_from,
-                    unavailable_weekdays = EXCLUDED.unavailable_weekdays,
-                    api_categories = EXCLUDED.api_categories,
-                    categoria_id = EXCLUDED.categoria_id,
-                    categoria_name = EXCLUDED.categoria_name,
-                    subcategoria_id = EXCLUDED.subcategoria_id,
-                    subcategoria_name = EXCLUDED.subcategoria_name,
-                    nested_category_id = EXCLUDED.nested_category_id,
-                    nested_category_name = EXCLUDED.nested_category_name,
-                    extraction_date = EXCLUDED.extraction_date,
-                    updated_at = CURRENT_TIMESTAMP
-            """
-            
-            cursor.execute(insert_sql, prepared_data)
+            if not self._upsert_prepared:
+                cursor.execute(_PREPARE_UPSERT_SQL)
+                self._upsert_prepared = True
+            cursor.execute(_EXECUTE_UPSERT_SQL, prepared_data)
             cursor.close()
             
-            logger.debug(f"Producto {prepared_data['id']} insertado/actualizado")
+            logger.debug(f"Producto {prepared_data[_ID]} insertado/actualizado")
             return True
             
         except Exception as e:
             logger.error(f"Error insertando producto {product.get('id', 'desconocido')}: {e}")
             return False
     
+    def _copy_and_merge(self, cursor, rows) -> List[Tuple[int, int]]:
+        """
+        Carga un lote grande con COPY en una tabla temporal y lo fusiona con un upsert.
+        
+        La tabla temporal vive hasta el COMMIT del archivo completo, así que
+        se crea con el primer lote grande y se vacía antes de cada uno.
+        
+        Returns:
+            [(insertados, actualizados)], igual que el upsert con execute_values
+        """
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS mercadona_productos_stg
+            (LIKE mercadona_productos INCLUDING DEFAULTS) ON COMMIT DROP
+        """)
+        cursor.execute("TRUNCATE mercadona_productos_stg")
+        _copy_rows(cursor, 'mercadona_productos_stg', _UPSERT_COLUMN_LIST, rows)
+        cursor.execute(_MERGE_STAGING_SQL)
+        return cursor.fetchall()
+    
     def load_products_from_json(self, json_file: str, batch_size: int = 100) -> Dict[str, int]:
         """
         Carga productos desde un archivo JSON.
         
+        Acepta tanto el JSON de save_to_json como el NDJSON de save_to_ndjson
+        (extensión .ndjson), que se lee línea a línea.
+        
         Args:
-            json_file: Ruta al archivo JSON con productos
-            batch_size: Tamaño del lote para commits
+            json_file: Ruta al archivo JSON o NDJSON con productos
+            batch_size: Productos por lote (una sentencia y un savepoint cada uno)
             
         Returns:
             Diccionario con estadísticas de la carga
@@ -281,6 +412,7 @@ class MercadonaProductLoader:
             'total_products': 0,
             'inserted': 0,
             'updated': 0,
+            'unchanged': 0,
             'errors': 0,
             'skipped': 0
         }
@@ -288,59 +420,105 @@ class MercadonaProductLoader:
         logger.info(f"🚀 Iniciando carga de productos desde {json_file}")
         
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            products = data.get('products', [])
-            stats['total_products'] = len(products)
-            
-            if not products:
-                logger.warning("No se encontraron productos en el archivo JSON")
-                return stats
-            
-            logger.info(f"📦 {len(products)} productos encontrados en el archivo")
-            
-            # Procesar en lotes
-            for i in range(0, len(products), batch_size):
-                batch = products[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                total_batches = (len(products) + batch_size - 1) // batch_size
+            if str(json_file).endswith('.ndjson'):
+                # Un producto por línea: ni siquiera hace falta el texto completo
+                products = _iter_ndjson_products(json_file)
+            else:
+                # Lectura binaria y una única decodificación: el modo texto pasa el
+                # fichero por el decodificador incremental y la traducción de saltos
+                # de línea, que en JSON son solo espacio en blanco
+                with open(json_file, 'rb') as f:
+                    texto = f.read().decode('utf-8')
+                
+                # Los productos se decodifican lote a lote según se van cargando
+                products = _iter_json_products(texto)
+            
+            # Misma fecha por defecto para todos los productos sin extraction_date
+            now = datetime.now()
+            
+            # Procesar en lotes, en orden y por una sola conexión: cada lote ya es
+            # una única sentencia (execute_values o COPY), y repartirlos entre
+            # varias conexiones dejaría que dos lotes con productos en común se
+            # bloquearan mutuamente al actualizar las mismas filas
+            batch_num = 0
+            while True:
+                batch = list(islice(products, batch_size))
+                if not batch:
+                    break
+                batch_num += 1
+                stats['total_products'] += len(batch)
                 
-                logger.info(f"📊 Procesando lote {batch_num}/{total_batches} ({len(batch)} productos)")
+                logger.info(f"📊 Procesando lote {batch_num} ({len(batch)} productos)")
                 
+                # Un producto repetido en el lote sólo se envía una vez (gana la
+                # última versión): ON CONFLICT no puede tocar dos veces la misma fila
+                rows: Dict[str, Tuple[Any, ...]] = {}
                 for product in batch:
                     try:
-                        # Verificar si el producto ya existe
-                        cursor = self.connection.cursor()
-                        cursor.execute(
-                            "SELECT id FROM mercadona_productos WHERE id = %s",
-                            (str(product.get('id', '')),)
-                        )
-                        exists = cursor.fetchone()
-                        cursor.close()
-                        
-                        # Insertar/actualizar producto
-                        if self.insert_product(product):
-                            if exists:
-                                stats['updated'] += 1
-                            else:
-                                stats['inserted'] += 1
-                        else:
-                            stats['skipped'] += 1
-                            
+                        prepared_data = self._prepare_product_data(product, now)
                     except Exception as e:
                         logger.error(f"Error procesando producto {product.get('id', 'desconocido')}: {e}")
                         stats['errors'] += 1
+                        continue
+                    
+                    # Validar datos mínimos requeridos
+                    product_id = prepared_data[_ID]
+                    if not product_id or not prepared_data[_DISPLAY_NAME]:
+                        logger.warning(f"Producto con datos insuficientes: {product_id or 'sin ID'}")
+                        stats['skipped'] += 1
+                        continue
+                    
+                    if product_id in rows:
+                        stats['updated'] += 1
+                    rows[product_id] = prepared_data
+                
+                if not rows:
+                    continue
                 
-                # Commit del lote
-                self.connection.commit()
-                logger.debug(f"Lote {batch_num} committed")
+                # Insertar/actualizar el lote completo en una sola sentencia. Todo el
+                # archivo es una transacción (un único COMMIT); cada lote va en su
+                # savepoint para poder descartar sólo el lote que falle
+                cursor = self.connection.cursor()
+                try:
+                    cursor.execute("SAVEPOINT lote_productos")
+                    if len(rows) >= _COPY_MIN_ROWS:
+                        resultados = self._copy_and_merge(cursor, rows.values())
+                    else:
+                        # page_size = lote completo: una única sentencia y un round-trip
+                        resultados = execute_values(
+                            cursor, _UPSERT_SQL, list(rows.values()),
+                            template=_UPSERT_TEMPLATE, page_size=len(rows), fetch=True
+                        )
+                    cursor.execute("RELEASE SAVEPOINT lote_productos")
+                except Exception as e:
+                    logger.error(f"Error insertando lote {batch_num}: {e}")
+                    cursor.execute("ROLLBACK TO SAVEPOINT lote_productos")
+                    stats['errors'] += len(rows)
+                    continue
+                finally:
+                    cursor.close()
+                
+                # Una fila (insertados, actualizados) por página de execute_values;
+                # el resto del lote ya estaba guardado sin cambios
+                for insertados, actualizados in resultados:
+                    stats['inserted'] += insertados
+                    stats['updated'] += actualizados
+                    stats['unchanged'] += len(rows) - insertados - actualizados
+                
+                logger.debug(f"Lote {batch_num} cargado")
+            
+            self.connection.commit()
+            
+            if not stats['total_products']:
+                logger.warning("No se encontraron productos en el archivo JSON")
+                return stats
             
             # Estadísticas finales
             logger.info("🎯 CARGA COMPLETADA:")
             logger.info(f"   📦 Total productos: {stats['total_products']}")
             logger.info(f"   ✅ Insertados: {stats['inserted']}")
             logger.info(f"   🔄 Actualizados: {stats['updated']}")
+            logger.info(f"   💤 Sin cambios: {stats['unchanged']}")
             logger.info(f"   ⚠️  Omitidos: {stats['skipped']}")
             logger.info(f"   ❌ Errores: {stats['errors']}")
             
@@ -370,7 +548,7 @@ class MercadonaProductLoader:
             
             delete_sql = """
                 DELETE FROM mercadona_productos 
-                WHERE extraction_date < CURRENT_DATE - INTERVAL '%s days'
+                WHERE extraction_date < CURRENT_DATE - %s * INTERVAL '1 day'
             """
             
             cursor.execute(delete_sql, (days_old,))
@@ -0,0 +1,31 @@
+"""
+Fixtures compartidas por los tests de integración.
+"""
+
+import os
+
+import pytest
+
+from src.mercagasto.processors.pdf_extractor import PDFTextExtractor
+
+
+@pytest.fixture(scope="session")
+def pdf_text():
+    """
+    Devuelve una función que extrae el texto de un PDF una sola vez por sesión.
+
+    La extracción es el paso más caro y varios tests parametrizados recorren
+    los mismos PDFs; el resultado se memoriza por (ruta, mtime, tamaño) para
+    que un PDF modificado durante la sesión se vuelva a extraer.
+    """
+    cache = {}
+
+    def _extract(pdf_path) -> str:
+        path = str(pdf_path)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if key not in cache:
+            cache[key] = PDFTextExtractor.extract_text_from_pdf(path)
+        return cache[key]
+
+    return _extract
@@ -5,7 +5,9 @@ Ejecuta este script para procesar PDFs y generar los JSON esperados automáticam
 """
 
 import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -16,36 +18,53 @@ from mercagasto.parsers import MercadonaTicketParser
 from mercagasto.processors import PDFTextExtractor
 
 
-def serialize_ticket_data(ticket):
-    """Convierte TicketData a diccionario serializable."""
-    result = {
-        'store_name': ticket.store_name,
-        'cif': ticket.cif,
-        'address': ticket.address,
-        'postal_code': ticket.postal_code,
-        'city': ticket.city,
-        'phone': ticket.phone,
-        'date': ticket.date.strftime('%Y-%m-%d') if ticket.date else None,
-        'time': ticket.time,
-        'order_number': ticket.order_number,
-        'invoice_number': ticket.invoice_number,
-        'total': ticket.total,
-        'payment_method': ticket.payment_method,
-        'products': [],
-        'iva_breakdown': ticket.iva_breakdown
-    }
-    
-    # Serializar productos
-    for product in ticket.products:
-        result['products'].append({
-            'quantity': product.quantity,
-            'description': product.description,
-            'unit_price': product.unit_price,
-            'total_price': product.total_price,
-            'weight': product.weight
-        })
-    
-    return result
+def _process_pdf(pdf_path: str):
+    """
+    Extrae, parsea y serializa un PDF en un proceso del pool.
+    
+    Devuelve (resultado serializado o None, mensajes a mostrar); los
+    mensajes se imprimen desde el proceso principal para no mezclar la
+    salida de varios PDFs.
+    """
+    messages = []
+    
+    try:
+        # Extraer texto
+        text = PDFTextExtractor.extract_text_from_pdf(pdf_path)
+        
+        if not text:
+            messages.append(f"   ❌ No se pudo extraer texto")
+            return None, messages
+            
+        if len(text.strip()) < 100:
+            messages.append(f"   ⚠️  Texto extraído muy corto ({len(text)} chars)")
+            return None, messages
+        
+        messages.append(f"   ✅ Texto extraído: {len(text)} caracteres")
+        
+        # Parsear ticket
+        parser = MercadonaTicketParser(text)
+        ticket = parser.parse()
+        
+        if not ticket.invoice_number:
+            messages.append(f"   ❌ No se pudo extraer número de factura")
+            return None, messages
+            
+        if ticket.total <= 0:
+            messages.append(f"   ❌ Total inválido: {ticket.total}")
+            return None, messages
+            
+        if not ticket.products:
+            messages.append(f"   ❌ No se encontraron productos")
+            return None, messages
+        
+        messages.append(f"   ✅ Parseado: {ticket.invoice_number}, {ticket.total}€, {len(ticket.products)} productos")
+        
+        return ticket.to_dict(), messages
+        
+    except Exception as e:
+        messages.append(f"   ❌ Error procesando {Path(pdf_path).name}: {e}")
+        return None, messages
 
 
 def generate_expected_results():
@@ -65,8 +84,12 @@ def generate_expected_results():
         print(f"💡 Crea el directorio y coloca tus PDFs ahí")
         return
     
-    # Buscar archivos PDF
-    pdf_files = list(pdfs_dir.glob('*.pdf'))
+    # Buscar archivos PDF (scandir reutiliza el tipo de cada entrada sin un stat extra)
+    with os.scandir(pdfs_dir) as entries:
+        pdf_files = sorted(
+            Path(entry.path) for entry in entries
+            if entry.name.endswith('.pdf') and entry.is_file()
+        )
     
     if not pdf_files:
         print(f"📁 No hay archivos PDF en {pdfs_dir}")
@@ -76,57 +99,31 @@ def generate_expected_results():
     print(f"🔍 Encontrados {len(pdf_files)} archivos PDF")
     print("="*50)
     
-    extractor = PDFTextExtractor()
-    
-    for pdf_file in pdf_files:
-        print(f"\n📄 Procesando: {pdf_file.name}")
+    # La extracción de texto domina el coste y cada PDF es independiente:
+    # se reparte entre procesos y los JSON se escriben desde el principal
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        outcomes = executor.map(_process_pdf, [str(p) for p in pdf_files], chunksize=4)
         
-        try:
-            # Extraer texto
-            text = extractor.extract_text_from_pdf(str(pdf_file))
+        for pdf_file, (result, messages) in zip(pdf_files, outcomes):
+            print(f"\n📄 Procesando: {pdf_file.name}")
+            for message in messages:
+                print(message)
             
-            if not text:
-                print(f"   ❌ No se pudo extraer texto")
+            if result is None:
                 continue
-                
-            if len(text.strip()) < 100:
-                print(f"   ⚠️  Texto extraído muy corto ({len(text)} chars)")
-                continue
-            
-            print(f"   ✅ Texto extraído: {len(text)} caracteres")
-            
-            # Parsear ticket
-            parser = MercadonaTicketParser(text)
-            ticket = parser.parse()
-            
-            if not ticket.invoice_number:
-                print(f"   ❌ No se pudo extraer número de factura")
-                continue
-                
-            if ticket.total <= 0:
-                print(f"   ❌ Total inválido: {ticket.total}")
-                continue
-                
-            if not ticket.products:
-                print(f"   ❌ No se encontraron productos")
-                continue
-            
-            print(f"   ✅ Parseado: {ticket.invoice_number}, {ticket.total}€, {len(ticket.products)} productos")
-            
-            # Serializar y guardar
-            result = serialize_ticket_data(ticket)
             
             json_name = pdf_file.name.replace('.pdf', '.json')
             json_file = expected_dir / json_name
             
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+            try:
+                # json.dump escribe el documento a trozos; se serializa en
+                # memoria y se vuelca con una única escritura
+                json_file.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding='utf-8')
+            except Exception as e:
+                print(f"   ❌ Error procesando {pdf_file.name}: {e}")
+                continue
             
             print(f"   💾 Guardado: {json_file.name}")
-            
-        except Exception as e:
-            print(f"   ❌ Error procesando {pdf_file.name}: {e}")
-            continue
     
     print("\n" + "="*50)
     print(f"✅ Generación completada")
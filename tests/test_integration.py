@@ -9,11 +9,21 @@ import json
 import os
 import pytest
 from pathlib import Path
-from datetime import datetime
 
 from src.mercagasto.parsers.mercadona import MercadonaTicketParser
 from src.mercagasto.processors.pdf_extractor import PDFTextExtractor
 
+# PDFs de prueba, listados una sola vez al importar el módulo
+_PDFS_DIR = Path(__file__).parent / 'data' / 'pdfs'
+if _PDFS_DIR.exists():
+    with os.scandir(_PDFS_DIR) as entries:
+        _PDF_FILES = sorted(
+            Path(entry.path) for entry in entries
+            if entry.name.endswith('.pdf') and entry.is_file()
+        )
+else:
+    _PDF_FILES = []
+
 
 class TestTicketParsing:
     """Tests de integración para parsing de tickets."""
@@ -22,14 +32,12 @@ class TestTicketParsing:
     def setup_class(cls):
         """Configuración inicial de la clase de test."""
         cls.test_data_dir = Path(__file__).parent / 'data'
-        cls.pdfs_dir = cls.test_data_dir / 'pdfs'
+        cls.pdfs_dir = _PDFS_DIR
         cls.expected_dir = cls.test_data_dir / 'expected'
     
     def get_pdf_files(self):
         """Obtiene lista de archivos PDF para testing."""
-        if not self.pdfs_dir.exists():
-            return []
-        return list(self.pdfs_dir.glob('*.pdf'))
+        return _PDF_FILES
     
     def get_expected_result(self, pdf_name: str):
         """Carga el resultado esperado para un PDF."""
@@ -42,50 +50,23 @@ class TestTicketParsing:
         with open(expected_file, 'r', encoding='utf-8') as f:
             return json.load(f)
     
-    def normalize_ticket_data(self, ticket_data):
-        """Normaliza los datos del ticket para comparación."""
-        # Convertir datetime a string para comparación
-        if hasattr(ticket_data, 'date') and isinstance(ticket_data.date, datetime):
-            ticket_data.date = ticket_data.date.strftime('%Y-%m-%d')
-        
-        # Convertir a dict si es un objeto
-        if hasattr(ticket_data, '__dict__'):
-            result = {}
-            for key, value in ticket_data.__dict__.items():
-                if key == 'products' and hasattr(value, '__iter__'):
-                    # Normalizar productos individualmente
-                    result[key] = []
-                    for prod in value:
-                        if hasattr(prod, '__dict__'):
-                            result[key].append(prod.__dict__)
-                        else:
-                            result[key].append(prod)
-                elif hasattr(value, '__dict__'):
-                    result[key] = value.__dict__
-                else:
-                    result[key] = value
-            return result
-        
-        return ticket_data
-    
     @pytest.mark.parametrize("pdf_file", [
-        pytest.param(pdf, id=pdf.name) 
-        for pdf in (Path(__file__).parent / 'data' / 'pdfs').glob('*.pdf')
-        if (Path(__file__).parent / 'data' / 'pdfs').exists()
+        pytest.param(pdf, id=pdf.name) for pdf in _PDF_FILES
     ])
-    def test_parse_pdf_tickets(self, pdf_file):
+    def test_parse_pdf_tickets(self, pdf_file, pdf_text):
         """
         Test parametrizado que valida el parsing de cada PDF.
         
         Args:
             pdf_file: Ruta al archivo PDF a testear
+            pdf_text: Extractor de texto memorizado por sesión
         """
         # Saltar si no hay PDFs
         if not pdf_file.exists():
             pytest.skip("No hay archivos PDF para testear")
         
         # Extraer texto del PDF
-        text = PDFTextExtractor.extract_text_from_pdf(str(pdf_file))
+        text = pdf_text(pdf_file)
         assert text is not None, f"No se pudo extraer texto de {pdf_file.name}"
         assert len(text.strip()) > 50, f"Texto extraído muy corto en {pdf_file.name}"
         
@@ -102,7 +83,7 @@ class TestTicketParsing:
         expected = self.get_expected_result(pdf_file.name)
         
         # Normalizar datos
-        actual = self.normalize_ticket_data(ticket)
+        actual = ticket.to_dict()
         
         # Comparaciones específicas
         assert actual['total'] == expected['total'], f"Total no coincide en {pdf_file.name}"
@@ -163,16 +144,14 @@ class TestPDFExtraction:
         assert PDFTextExtractor.extract_text_from_pdf is not None
     
     @pytest.mark.parametrize("pdf_file", [
-        pytest.param(pdf, id=pdf.name) 
-        for pdf in (Path(__file__).parent / 'data' / 'pdfs').glob('*.pdf')
-        if (Path(__file__).parent / 'data' / 'pdfs').exists()
+        pytest.param(pdf, id=pdf.name) for pdf in _PDF_FILES
     ])
-    def test_pdf_text_extraction(self, pdf_file):
+    def test_pdf_text_extraction(self, pdf_file, pdf_text):
         """Test de extracción de texto de PDFs."""
         if not pdf_file.exists():
             pytest.skip("No hay archivos PDF para testear")
         
-        text = PDFTextExtractor.extract_text_from_pdf(str(pdf_file))
+        text = pdf_text(pdf_file)
         
         assert text is not None, f"No se pudo extraer texto de {pdf_file.name}"
         assert len(text.strip()) > 0, f"Texto extraído vacío en {pdf_file.name}"
@@ -1,39 +1,48 @@
+import logging
+import os
 import pytest
+from datetime import datetime
 from pathlib import Path
+from uuid import uuid4
 
 from src.mercagasto.parsers.mercadona import MercadonaTicketParser
-from src.mercagasto.processors.pdf_extractor import PDFTextExtractor
 from src.mercagasto.storage.postgresql import PostgreSQLTicketStorage
 from src.mercagasto.config.settings import get_database_config
+from src.mercagasto.models import Product, TicketData
+
+# PDFs de prueba, listados una sola vez al importar el módulo
+_PDFS_DIR = Path(__file__).parent / 'data' / 'pdfs'
+if _PDFS_DIR.exists():
+    with os.scandir(_PDFS_DIR) as entries:
+        _PDF_FILES = sorted(
+            Path(entry.path) for entry in entries
+            if entry.name.endswith('.pdf') and entry.is_file()
+        )
+else:
+    _PDF_FILES = []
 
 @pytest.fixture(scope="module")
 def storage():
     config = get_database_config()
-    return PostgreSQLTicketStorage(config)
+    storage = PostgreSQLTicketStorage(config)
+    yield storage
+    storage.close()
 
 @pytest.fixture
 def pdf_files():
-    pdfs_dir = Path(__file__).parent / 'data' / 'pdfs'
-    return list(pdfs_dir.glob('*.pdf'))
-
-def normalize_ticket(ticket):
-    
-    # Convierte TicketData a dict para comparación
-    result = ticket.__dict__.copy()
-    result['products'] = [p.__dict__.copy() for p in ticket.products]
-    if hasattr(ticket, 'date') and ticket.date:
-        result['date'] = str(ticket.date)
-    return result
+    return list(_PDF_FILES)
+
+def cents(importe) -> int:
+    # Los importes de los tickets son exactos a dos decimales: se comparan en céntimos
+    return round(importe * 100)
 
 @pytest.mark.parametrize("pdf_file", [
-    pytest.param(pdf, id=pdf.name)
-    for pdf in (Path(__file__).parent / 'data' / 'pdfs').glob('*.pdf')
-    if (Path(__file__).parent / 'data' / 'pdfs').exists()
+    pytest.param(pdf, id=pdf.name) for pdf in _PDF_FILES
 ])
-def test_pdf_to_db_and_back(storage, pdf_file):
+def test_pdf_to_db_and_back(storage, pdf_file, pdf_text):
     print("Fichero PDF de test:", pdf_file)
     # 1. Extraer texto del PDF
-    text = PDFTextExtractor.extract_text_from_pdf(str(pdf_file))
+    text = pdf_text(pdf_file)
     assert text and len(text) > 50, f"Texto insuficiente en {pdf_file.name}"
 
     # 2. Parsear ticket
@@ -51,16 +60,78 @@ def test_pdf_to_db_and_back(storage, pdf_file):
     assert db_ticket is not None
 
     # 5. Normalizar y comparar
-    t1 = normalize_ticket(ticket)
-    t2 = normalize_ticket(db_ticket)
+    t1 = ticket.to_dict()
+    t2 = db_ticket.to_dict()
 
     # Comparar campos clave
     assert t1['invoice_number'] == t2['invoice_number']
-    assert t1['total'] == pytest.approx(t2['total'], abs=0.01)
+    assert cents(t1['total']) == cents(t2['total'])
     assert len(t1['products']) == len(t2['products'])
 
-    # Comparar productos
-    for i, (p1, p2) in enumerate(zip(t1['products'], t2['products'])):
-        assert p1['description'] == p2['description']
-        assert p1['quantity'] == p2['quantity']
-        assert p1['total_price'] == pytest.approx(p2['total_price'], abs=0.01)
\ No newline at end of file
+    # Comparar productos: una comparación por columna en lugar de una por producto
+    assert [(p['description'], p['quantity']) for p in t1['products']] == \
+        [(p['description'], p['quantity']) for p in t2['products']]
+    assert [cents(p['total_price']) for p in t1['products']] == \
+        [cents(p['total_price']) for p in t2['products']]
+
+
+def make_ticket(invoice_number, products):
+    productos = [Product(quantity=1, description=d, unit_price=precio, total_price=precio)
+                 for d, precio in products]
+    return TicketData(
+        store_name="MERCADONA, S.A.", cif="A-46103834", address="C/ TEST 1",
+        postal_code="46000", city="VALENCIA", phone="963000000",
+        date=datetime(2025, 1, 15), time="10:30", order_number="0000-000-000000",
+        invoice_number=invoice_number, products=productos,
+        total=round(sum(precio for _, precio in products), 2),
+        payment_method="TARJETA BANCARIA", iva_breakdown={}
+    )
+
+
+def test_save_tickets_empty_batch(storage):
+    assert storage.save_tickets([]) == []
+
+
+def test_save_tickets_batch_duplicates(storage, caplog):
+    if not storage.test_connection():
+        pytest.skip("Base de datos no disponible")
+
+    prefijo = uuid4().hex[:8]
+    f1, f2, f3 = (f"T{prefijo}-{n}" for n in (1, 2, 3))
+    ticket_ids = []
+    try:
+        # 1. Lote con una factura repetida: la repetición recibe el mismo id
+        with caplog.at_level(logging.WARNING):
+            ids = storage.save_tickets([
+                make_ticket(f1, [("PAN", 1.10), ("LECHE", 0.95)]),
+                make_ticket(f2, [("HUEVOS", 2.30)]),
+                make_ticket(f1, [("AGUA", 0.40)]),
+            ])
+        ticket_ids.extend(ids)
+        assert len(ids) == 3
+        assert ids[0] == ids[2]
+        assert ids[0] != ids[1]
+        assert any("duplicado" in r.getMessage() and f1 in r.getMessage() for r in caplog.records)
+
+        # Solo la primera aparición de la factura aporta productos
+        assert [p.description for p in storage.get_products_by_ticket_id(ids[0])] == ["PAN", "LECHE"]
+        assert [p.description for p in storage.get_products_by_ticket_id(ids[1])] == ["HUEVOS"]
+
+        # 2. Lote con una factura ya guardada y otra nueva
+        caplog.clear()
+        with caplog.at_level(logging.WARNING):
+            ids2 = storage.save_tickets([
+                make_ticket(f2, [("ACEITE", 4.50)]),
+                make_ticket(f3, [("ARROZ", 1.25)]),
+            ])
+        ticket_ids.extend(ids2)
+        assert ids2[0] == ids[1]
+        assert ids2[1] not in ids
+        assert any("duplicado" in r.getMessage() and f2 in r.getMessage() for r in caplog.records)
+        assert not any(f3 in r.getMessage() for r in caplog.records if "duplicado" in r.getMessage())
+
+        # El ticket existente conserva sus productos y solo el nuevo recibe los suyos
+        assert [p.description for p in storage.get_products_by_ticket_id(ids[1])] == ["HUEVOS"]
+        assert [p.description for p in storage.get_products_by_ticket_id(ids2[1])] == ["ARROZ"]
+    finally:
+        storage.delete_test_tickets(sorted(set(ticket_ids)))
@@ -0,0 +1,184 @@
+"""
+Tests de la reanudación de extracciones desde el NDJSON de salida.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from src.mercagasto.processors.mercadona_api_client import (
+    MercadonaAPIClient, MercadonaProductExtractor
+)
+
+
+def lineas(*grupos, campo='subcategory_id'):
+    """Líneas NDJSON para grupos (id_categoria, num_productos) en orden."""
+    return ''.join(
+        json.dumps({campo: category_id, 'id': f'{category_id}-{i}'}) + '\n'
+        for category_id, total in grupos
+        for i in range(total)
+    )
+
+
+class FakeAPIClient:
+    """Cliente falso que devuelve productos por subcategoría y anota las pedidas."""
+    
+    def __init__(self):
+        self.pedidas = []
+    
+    def get_subcategory_products(self, subcategory_id):
+        self.pedidas.append(subcategory_id)
+        return {
+            'name': f'Sub {subcategory_id}',
+            'categories': [{'id': 1, 'name': 'Anidada', 'products': [
+                {'id': f'{subcategory_id}-nuevo'}
+            ]}]
+        }
+
+
+class TestResumeNdjson(unittest.TestCase):
+    """Tests para MercadonaProductExtractor._resume_ndjson."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'productos.ndjson')
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def escribir(self, texto):
+        with open(self.path, 'w', encoding='utf-8', newline='') as f:
+            f.write(texto)
+    
+    def leer(self):
+        with open(self.path, encoding='utf-8', newline='') as f:
+            return f.read()
+    
+    def resume(self, campo='subcategory_id'):
+        return MercadonaProductExtractor._resume_ndjson(self.path, campo)
+    
+    def test_archivo_vacio(self):
+        """Test de un archivo vacío: nada completado y sigue vacío."""
+        self.escribir('')
+        
+        self.assertEqual(self.resume(), {})
+        self.assertEqual(self.leer(), '')
+    
+    def test_ultima_categoria_completa_se_descarta(self):
+        """Test de que la última categoría, aunque esté completa, se repite."""
+        self.escribir(lineas((1, 2), (2, 3), (3, 1)))
+        
+        self.assertEqual(self.resume(), {1: 2, 2: 3})
+        self.assertEqual(self.leer(), lineas((1, 2), (2, 3)))
+    
+    def test_una_sola_categoria(self):
+        """Test de un archivo con una única categoría."""
+        self.escribir(lineas((7, 4)))
+        
+        self.assertEqual(self.resume(), {})
+        self.assertEqual(self.leer(), '')
+    
+    def test_ultima_linea_parcial(self):
+        """Test de una última línea cortada a mitad de escritura."""
+        self.escribir(lineas((1, 2), (2, 2)) + '{"subcategory_id": 3, "id": "3-')
+        
+        self.assertEqual(self.resume(), {1: 2})
+        self.assertEqual(self.leer(), lineas((1, 2)))
+    
+    def test_ultima_linea_sin_salto(self):
+        """Test de una última línea JSON válida pero sin salto de línea final."""
+        self.escribir(lineas((1, 1), (2, 1)) + '{"subcategory_id": 2, "id": "2-1"}')
+        
+        self.assertEqual(self.resume(), {1: 1})
+        self.assertEqual(self.leer(), lineas((1, 1)))
+    
+    def test_linea_ilegible_en_medio(self):
+        """Test de una línea ilegible: se corta antes de la categoría en curso."""
+        self.escribir(lineas((1, 2), (2, 1)) + 'no es json\n' + lineas((3, 2), (4, 1)))
+        
+        self.assertEqual(self.resume(), {1: 2})
+        self.assertEqual(self.leer(), lineas((1, 2)))
+    
+    def test_linea_sin_el_campo_en_medio(self):
+        """Test de líneas sin el campo de categoría o que no son objetos."""
+        for mala in ('{"id": "sin campo"}\n', '[1, 2]\n', '{"subcategory_id": null}\n'):
+            with self.subTest(mala=mala):
+                self.escribir(lineas((1, 1), (2, 1)) + mala + lineas((3, 1)))
+                
+                self.assertEqual(self.resume(), {1: 1})
+                self.assertEqual(self.leer(), lineas((1, 1)))
+    
+    def test_categoria_que_reaparece(self):
+        """Test de una categoría ya completada que vuelve a aparecer."""
+        self.escribir(lineas((1, 1), (2, 1), (1, 1), (3, 1)))
+        
+        self.assertEqual(self.resume(), {1: 1})
+        self.assertEqual(self.leer(), lineas((1, 1)))
+    
+    def test_campo_de_categoria(self):
+        """Test de que se agrupa por el campo indicado (subcategoría o categoría)."""
+        texto = ''.join(
+            json.dumps({'category_id': category_id, 'subcategory_id': subcategory_id}) + '\n'
+            for category_id, subcategory_id in ((10, 1), (10, 2), (10, 2), (20, 3), (30, 4))
+        )
+        
+        self.escribir(texto)
+        self.assertEqual(self.resume('subcategory_id'), {1: 1, 2: 2, 3: 1})
+        
+        self.escribir(texto)
+        self.assertEqual(self.resume('category_id'), {10: 3, 20: 1})
+        self.assertEqual(self.leer(), ''.join(texto.splitlines(True)[:4]))
+
+
+class TestExtractAllProductsResume(unittest.TestCase):
+    """Tests de extract_all_products con resume=True."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'productos.ndjson')
+        self.api = FakeAPIClient()
+        self.client = MercadonaAPIClient(request_interval=0)
+        self.extractor = MercadonaProductExtractor(self.client)
+        self.extractor.api_client = self.api
+    
+    def tearDown(self):
+        self.client.close()
+        self.tmp.cleanup()
+    
+    def extraer(self, category_ids):
+        return self.extractor.extract_all_products(
+            category_ids, delay_between_categories=0, treat_as_subcategories=True,
+            max_workers=2, ndjson_file=self.path, resume=True
+        )
+    
+    def ids_en_archivo(self):
+        with open(self.path, encoding='utf-8') as f:
+            return [json.loads(linea)['id'] for linea in f]
+    
+    def test_omite_exactamente_las_completadas(self):
+        """Test de que sólo se descargan las categorías no completadas."""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(lineas((1, 2), (2, 1), (3, 1)) + '{"subcategory_id": 4, "id"')
+        
+        self.extraer([1, 2, 3, 4, 5])
+        
+        # Los hilos pueden pedirlas en cualquier orden; el archivo sale en orden
+        self.assertEqual(sorted(self.api.pedidas), [3, 4, 5])
+        self.assertEqual(self.ids_en_archivo(),
+                         ['1-0', '1-1', '2-0', '3-nuevo', '4-nuevo', '5-nuevo'])
+        stats = self.extractor.extraction_stats
+        self.assertEqual(stats['categories_processed'], 5)
+        self.assertEqual(stats['total_products'], 6)
+        self.assertEqual(stats['category_products'], {1: 2, 2: 1, 3: 1, 4: 1, 5: 1})
+    
+    def test_sin_archivo_previo(self):
+        """Test de resume sin archivo previo: se extrae todo."""
+        self.extraer([1, 2])
+        
+        self.assertEqual(sorted(self.api.pedidas), [1, 2])
+        self.assertEqual(self.ids_en_archivo(), ['1-nuevo', '2-nuevo'])
+
+
+if __name__ == '__main__':
+    unittest.main()
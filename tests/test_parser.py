@@ -12,9 +12,10 @@ from src.mercagasto.models import TicketData
 class TestMercadonaTicketParser(unittest.TestCase):
     """Tests para el parser de tickets de Mercadona."""
     
-    def setUp(self):
-        """Configuración de tests."""
-        self.sample_text = """
+    @classmethod
+    def setUpClass(cls):
+        """Configuración de tests: el ticket de ejemplo se parsea una sola vez."""
+        cls.sample_text = """
         MERCADONA, S.A. A-12345678
         C/ EJEMPLO 123
         28000 MADRID
@@ -37,11 +38,18 @@ class TestMercadonaTicketParser(unittest.TestCase):
         
         TARJETA BANCARIA
         """
+        cls.ticket = MercadonaTicketParser(cls.sample_text).parse()
+    
+    def test_parse_runs(self):
+        """Test de que cada parseo del mismo texto da el mismo resultado."""
+        ticket = MercadonaTicketParser(self.sample_text).parse()
+        
+        self.assertIsInstance(ticket, TicketData)
+        self.assertEqual(ticket.to_dict(), self.ticket.to_dict())
     
     def test_parser_basic_info(self):
         """Test parsing de información básica."""
-        parser = MercadonaTicketParser(self.sample_text)
-        ticket = parser.parse()
+        ticket = self.ticket
         
         self.assertEqual(ticket.store_name, "MERCADONA, S.A.")
         self.assertEqual(ticket.cif, "A-12345678")
@@ -54,8 +62,7 @@ class TestMercadonaTicketParser(unittest.TestCase):
         
     def test_parser_products(self):
         """Test parsing de productos."""
-        parser = MercadonaTicketParser(self.sample_text)
-        ticket = parser.parse()
+        ticket = self.ticket
         
         self.assertEqual(len(ticket.products), 3)
         
@@ -74,18 +81,32 @@ class TestMercadonaTicketParser(unittest.TestCase):
     
     def test_parser_total(self):
         """Test parsing del total."""
-        parser = MercadonaTicketParser(self.sample_text)
-        ticket = parser.parse()
+        ticket = self.ticket
         
         self.assertEqual(ticket.total, 7.45)
         
     def test_ticket_validation(self):
         """Test validación de ticket."""
-        parser = MercadonaTicketParser(self.sample_text)
-        ticket = parser.parse()
+        ticket = self.ticket
         
         # El total debería ser consistente
         self.assertTrue(ticket.is_total_consistent)
+    
+    def test_ticket_to_dict(self):
+        """Test serialización del ticket a diccionario."""
+        ticket = self.ticket
+        
+        data = ticket.to_dict()
+        self.assertEqual(data['date'], "2025-12-01")
+        self.assertEqual(data['invoice_number'], "001-123-456")
+        self.assertEqual(data['total'], 7.45)
+        self.assertEqual(data['products'][1], {
+            'quantity': 2,
+            'description': "LECHE ENTERA",
+            'unit_price': 1.20,
+            'total_price': 2.40,
+            'weight': None
+        })
 
 
 if __name__ == '__main__':
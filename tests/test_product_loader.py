@@ -0,0 +1,111 @@
+"""
+Tests del recorrido en streaming del JSON de productos.
+"""
+
+import json
+import unittest
+
+from src.mercagasto.storage.product_loader import _iter_json_products
+
+
+def productos(texto):
+    return list(_iter_json_products(texto))
+
+
+class TestIterJsonProducts(unittest.TestCase):
+    """Tests para _iter_json_products."""
+    
+    def test_documento_de_extraccion(self):
+        """Test de que los productos salen igual que con json.loads."""
+        documento = {
+            'extraction_stats': {'total_products': 2, 'errors': 0},
+            'total_products': 2,
+            'products': [
+                {'id': '1', 'display_name': 'Leche', 'badges': {'is_water': False}},
+                {'id': '2', 'display_name': 'Pan', 'categories': [{'id': 3}]}
+            ]
+        }
+        texto = json.dumps(documento, ensure_ascii=False, indent=2)
+        
+        self.assertEqual(productos(texto), documento['products'])
+    
+    def test_objeto_vacio(self):
+        """Test de un objeto sin claves."""
+        self.assertEqual(productos('{}'), [])
+        self.assertEqual(productos(' { } '), [])
+    
+    def test_lista_de_productos_vacia(self):
+        """Test de una lista 'products' vacía, al principio y al final."""
+        self.assertEqual(productos('{"products": []}'), [])
+        self.assertEqual(productos('{"products": [], "total_products": 0}'), [])
+        self.assertEqual(productos('{"total_products": 0, "products": [ ]}'), [])
+    
+    def test_products_anidado_en_otro_valor(self):
+        """Test de que sólo cuenta la clave 'products' de primer nivel."""
+        texto = json.dumps({
+            'extraction_info': {'products': [{'id': 'anidado'}]},
+            'lista': [{'products': [{'id': 'en lista'}]}],
+            'products': [{'id': 'real'}]
+        })
+        
+        self.assertEqual(productos(texto), [{'id': 'real'}])
+    
+    def test_products_que_no_es_lista(self):
+        """Test de una clave 'products' de primer nivel que no es una lista."""
+        self.assertEqual(productos('{"products": null, "total_products": 0}'), [])
+    
+    def test_cadenas_con_cierres(self):
+        """Test de cadenas que contienen '}', ']' o comillas escapadas."""
+        documento = {
+            'nota': 'fin } y ] y ,',
+            'products': [
+                {'id': '1', 'display_name': 'Pack {2} [ud]'},
+                {'id': '2', 'display_name': 'Comilla \" } ]'}
+            ]
+        }
+        
+        self.assertEqual(productos(json.dumps(documento)), documento['products'])
+    
+    def test_espacios_alrededor_de_separadores(self):
+        """Test de espacios, tabuladores y saltos de línea entre tokens."""
+        texto = '\n { "total_products" :\t2 ,\r\n "products"\n:\n[ {"id": "1"} ,\n\t{"id": "2"}\n] \n} \n'
+        
+        self.assertEqual(productos(texto), [{'id': '1'}, {'id': '2'}])
+    
+    def test_coma_final_en_productos(self):
+        """Test de una coma final dentro de la lista de productos."""
+        with self.assertRaises(ValueError):
+            productos('{"products": [{"id": "1"},]}')
+    
+    def test_coma_final_en_objeto(self):
+        """Test de una coma final tras la última clave."""
+        with self.assertRaises(ValueError):
+            productos('{"products": [{"id": "1"}],}')
+    
+    def test_falta_dos_puntos(self):
+        """Test de una clave sin ':'."""
+        with self.assertRaises(ValueError):
+            productos('{"products" [{"id": "1"}]}')
+    
+    def test_falta_separador(self):
+        """Test de dos valores seguidos sin coma."""
+        with self.assertRaises(ValueError):
+            productos('{"products": [{"id": "1"} {"id": "2"}]}')
+        with self.assertRaises(ValueError):
+            productos('{"total_products": 1 "products": []}')
+    
+    def test_primer_nivel_no_es_objeto(self):
+        """Test de documentos cuyo primer nivel no es un objeto."""
+        for texto in ('[{"id": "1"}]', '"products"', '', '   '):
+            with self.subTest(texto=texto):
+                with self.assertRaises(ValueError):
+                    productos(texto)
+    
+    def test_documento_truncado(self):
+        """Test de un archivo cortado a mitad de la lista."""
+        with self.assertRaises(ValueError):
+            productos('{"products": [{"id": "1"}, {"id": ')
+
+
+if __name__ == '__main__':
+    unittest.main()